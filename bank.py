@@ -1,16 +1,32 @@
 import json
 import os
-from typing import Dict, Optional
-from bank_account import Account, Transaction
+from datetime import datetime
+from typing import Dict, FrozenSet, Optional, Set
+from bank_account import CREDIT_TYPES, TRANSACTION_TYPES, Account, SpillFile, Transaction
+from bank_journal import Journal
+from bank_snapshot import AccountTable, Snapshot, write_snapshot
 
 
 class Bank:
     """Main bank management system"""
     
-    def __init__(self, bank_name: str = "MyBank"):
+    def __init__(self, bank_name: str = "MyBank", history_window: Optional[int] = None,
+                 spill_dir: Optional[str] = None):
         self.bank_name = bank_name
-        self.accounts: Dict[str, Account] = {}
+        # Bounded histories: accounts keep about their last history_window
+        # transactions in memory and move older ones to a scratch file
+        self.history_window = history_window
+        self.spill = SpillFile(spill_dir) if history_window else None
+        self.accounts = AccountTable(on_load=self._follow)
         self.next_account_number = 1001
+        # Running totals, kept up to date by every change (see _count and _on_change)
+        self._reset_totals()
+        # Journal mode (see open_journal)
+        self.journal: Optional[Journal] = None
+        self.snapshot_path: Optional[str] = None
+        self.snapshot_every = 1000
+        self.sequence = 0
+        self.snapshot_sequence = 0
     
     def create_account(self, account_holder: str, initial_balance: float = 0.0) -> Optional[Account]:
         """Create a new bank account"""
@@ -22,7 +38,11 @@ class Bank:
         self.next_account_number += 1
         
         account = Account(account_number, account_holder, initial_balance)
-        self.accounts[account_number] = account
+        self._adopt(account)
+        record = {'op': 'C', 'a': account_number, 'h': account_holder, 'm': initial_balance}
+        if account.transactions:
+            record['t'] = account.transactions[0].timestamp.isoformat()
+        self._journal(record)
         
         print(f"Account created successfully!")
         print(f"Account Number: {account_number}")
@@ -58,21 +78,22 @@ class Bank:
             print(f"Error: Insufficient funds in account {from_account_number}")
             return False
         
-        from_account.balance -= amount
-        from_account.transactions.append(
-            Transaction("TRANSFER_OUT", amount, from_account.balance, 
-                       f"Transfer to account {to_account_number}")
-        )
-        
-        to_account.balance += amount
-        to_account.transactions.append(
-            Transaction("TRANSFER_IN", amount, to_account.balance, 
-                       f"Transfer from account {from_account_number}")
-        )
+        transfer_out = self._post_transfer(from_account, to_account, amount)
+        self._journal({'op': 'T', 'f': from_account_number, 'a': to_account_number, 'm': amount,
+                       't': transfer_out.timestamp.isoformat()})
         
         print(f"Successfully transferred ${amount:.2f} from account {from_account_number} to {to_account_number}")
         return True
     
+    def _post_transfer(self, from_account: Account, to_account: Account, amount: float,
+                       timestamp: Optional[datetime] = None) -> Transaction:
+        """Record both legs of a validated transfer; returns the outgoing leg"""
+        transfer_out = from_account._post("TRANSFER_OUT", amount, f"Transfer to account {to_account.account_number}",
+                                          timestamp)
+        to_account._post("TRANSFER_IN", amount, f"Transfer from account {from_account.account_number}",
+                         transfer_out.timestamp)
+        return transfer_out
+    
     def list_all_accounts(self):
         """List all accounts in the bank"""
         if not self.accounts:
@@ -95,9 +116,57 @@ class Bank:
         account.close_account()
         return True
     
-    def save_to_file(self, filename: str = "bank_data.json"):
-        """Save bank data to a JSON file"""
-        data = {
+    def _adopt(self, account: Account):
+        """Add an account to the bank and follow its changes"""
+        self._count(account)
+        self._follow(account)
+        self.accounts[account.account_number] = account
+    
+    def _follow(self, account: Account):
+        account.listener = self._on_change
+        if self.history_window:
+            account.transactions.bound(self.history_window, self.spill)
+    
+    def _reset_totals(self):
+        self.total_balance = 0.0
+        self.active_count = 0
+        self.posting_counts = dict.fromkeys(TRANSACTION_TYPES, 0)
+        self.posting_volumes = dict.fromkeys(TRANSACTION_TYPES, 0.0)
+        # Numbers of the active accounts; built on first use (see get_active_account_numbers)
+        self._active: Optional[Set[str]] = None
+    
+    def _count(self, account: Account):
+        """Add an account joining the bank, and the postings it already has, to the totals"""
+        self.total_balance += account.balance
+        if account.is_active:
+            self.active_count += 1
+            if self._active is not None:
+                self._active.add(account.account_number)
+        history = account.transactions.columns()
+        for type_code, amount in zip(history.types, history.amounts):
+            self.posting_counts[TRANSACTION_TYPES[type_code]] += 1
+            self.posting_volumes[TRANSACTION_TYPES[type_code]] += amount
+    
+    def _on_change(self, account: Account, transaction: Optional[Transaction]):
+        """Update the totals for, and journal, a posting or closure made on one of the accounts"""
+        if transaction is None:
+            self.active_count -= 1
+            if self._active is not None:
+                self._active.discard(account.account_number)
+            self._journal({'op': 'X', 'a': account.account_number})
+            return
+        
+        amount = transaction.amount
+        self.total_balance += amount if transaction.type in CREDIT_TYPES else -amount
+        self.posting_counts[transaction.type] += 1
+        self.posting_volumes[transaction.type] += amount
+        if transaction.type in ("DEPOSIT", "WITHDRAWAL"):
+            self._journal({'op': transaction.type[0], 'a': account.account_number, 'm': transaction.amount,
+                           'd': transaction.description, 't': transaction.timestamp.isoformat()})
+    
+    def to_dict(self) -> Dict:
+        """Convert the whole bank to a dictionary for storage"""
+        return {
             'bank_name': self.bank_name,
             'next_account_number': self.next_account_number,
             'accounts': {
@@ -105,6 +174,21 @@ class Bank:
                 for acc_num, account in self.accounts.items()
             }
         }
+    
+    def _restore(self, data: Dict):
+        """Replace the bank's state with one saved by to_dict"""
+        self.bank_name = data.get('bank_name', 'MyBank')
+        self.next_account_number = data.get('next_account_number', 1001)
+        
+        self.accounts.close()
+        self.accounts = AccountTable(on_load=self._follow)
+        self._reset_totals()
+        for acc_data in data.get('accounts', {}).values():
+            self._adopt(Account.from_dict(acc_data))
+    
+    def save_to_file(self, filename: str = "bank_data.json"):
+        """Save bank data to a JSON file"""
+        data = self.to_dict()
         
         try:
             with open(filename, 'w') as f:
@@ -116,28 +200,21 @@ class Bank:
             return False
     
     def load_from_file(self, filename: str = "bank_data.json"):
-        """Load bank data from a JSON file"""
+        """Load bank data from a JSON file or a binary snapshot"""
         if not os.path.exists(filename):
             print(f"File {filename} not found")
             return False
         
         try:
-            with open(filename, 'r') as f:
-                data = json.load(f)
-            
-            self.bank_name = data.get('bank_name', 'MyBank')
-            self.next_account_number = data.get('next_account_number', 1001)
-            
-            self.accounts = {}
-            for acc_num, acc_data in data.get('accounts', {}).items():
-                account = Account(
-                    acc_data['account_number'],
-                    acc_data['account_holder'],
-                    acc_data['balance']
-                )
-                account.is_active = acc_data.get('is_active', True)
-                account.transactions = []
-                self.accounts[acc_num] = account
+            if Snapshot.is_snapshot(filename):
+                self._open_snapshot(filename)
+            else:
+                with open(filename, 'r') as f:
+                    data = json.load(f)
+                self._restore(data)
+            if self.journal:
+                # The journal cannot express a wholesale load; start over from a snapshot of it
+                self.snapshot()
             
             print(f"Bank data loaded successfully from {filename}")
             return True
@@ -145,9 +222,146 @@ class Bank:
             print(f"Error loading bank data: {e}")
             return False
     
+    def save_snapshot(self, filename: str = "bank_data.snap") -> bool:
+        """Save the bank as a binary snapshot (see bank_snapshot)"""
+        try:
+            self._write_snapshot(filename)
+            print(f"Bank snapshot saved successfully to {filename}")
+            return True
+        except Exception as e:
+            print(f"Error saving bank snapshot: {e}")
+            return False
+    
+    def _write_snapshot(self, filename: str):
+        temp_path = write_snapshot(filename, self.bank_name, self.next_account_number, self.sequence, self.accounts,
+                                   self.posting_counts, self.posting_volumes)
+        # Accounts not loaded yet were copied from the mapped file; it can go now
+        mapped = self.accounts.snapshot
+        self.accounts.close()
+        try:
+            os.replace(temp_path, filename)
+        except OSError:
+            if mapped:
+                self.accounts.snapshot = Snapshot(mapped.path)
+            raise
+        self.accounts.rebase(Snapshot(filename))
+    
+    def _open_snapshot(self, filename: str) -> Snapshot:
+        """Map a binary snapshot; its accounts are only built when first looked up"""
+        snapshot = Snapshot(filename)
+        self.accounts.close()
+        self.accounts = AccountTable(snapshot, on_load=self._follow)
+        self.bank_name = snapshot.bank_name
+        self.next_account_number = snapshot.next_account_number
+        self._reset_totals()
+        self.total_balance = snapshot.total_balance
+        self.active_count = snapshot.active_count
+        self.posting_counts.update(snapshot.posting_counts)
+        self.posting_volumes.update(snapshot.posting_volumes)
+        return snapshot
+    
+    def open_journal(self, directory: str, snapshot_every: int = 1000, sync: bool = False) -> bool:
+        """Recover the bank from ``directory`` and journal every later change there.
+        
+        Startup loads the last snapshot and replays the journal records written
+        after it. Each change then appends one compact record (flushed, and
+        fsynced too with ``sync``); every ``snapshot_every`` records a new
+        snapshot is written and the journal emptied.
+        """
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self.snapshot_path = os.path.join(directory, 'snapshot.snap')
+            self.snapshot_every = snapshot_every
+            self.sequence = 0
+            if os.path.exists(self.snapshot_path):
+                self.sequence = self._open_snapshot(self.snapshot_path).sequence
+            self.snapshot_sequence = self.sequence
+            
+            journal = Journal(os.path.join(directory, 'journal.log'), sync)
+            replayed = 0
+            for record in journal.replay():
+                # Records older than the snapshot are left over from a crash during snapshot()
+                if record['s'] > self.sequence:
+                    self._apply(record)
+                    self.sequence = record['s']
+                    replayed += 1
+            self.journal = journal
+            
+            print(f"Recovered {len(self.accounts)} accounts from {directory} ({replayed} journal records replayed)")
+            return True
+        except Exception as e:
+            print(f"Error opening journal: {e}")
+            return False
+    
+    def _apply(self, record: Dict):
+        """Replay one journal record"""
+        op = record['op']
+        timestamp = datetime.fromisoformat(record['t']) if 't' in record else None
+        if op == 'C':
+            account = Account(record['a'], record['h'])
+            if record['m'] > 0:
+                account._post("INITIAL", record['m'], "Account opened", timestamp)
+            self._adopt(account)
+            self.next_account_number = int(record['a']) + 1
+        elif op == 'D':
+            self.accounts[record['a']]._post("DEPOSIT", record['m'], record['d'], timestamp)
+        elif op == 'W':
+            self.accounts[record['a']]._post("WITHDRAWAL", record['m'], record['d'], timestamp)
+        elif op == 'T':
+            self._post_transfer(self.accounts[record['f']], self.accounts[record['a']], record['m'], timestamp)
+        elif op == 'X':
+            self.accounts[record['a']]._close()
+    
+    def _journal(self, record: Dict):
+        if self.journal is None:
+            return
+        
+        self.sequence += 1
+        self.journal.append({'s': self.sequence, **record})
+        if self.sequence - self.snapshot_sequence >= self.snapshot_every:
+            self.snapshot()
+    
+    def snapshot(self) -> bool:
+        """Write a snapshot of the whole bank and empty the journal it covers"""
+        if self.journal is None:
+            print("Error: Journal mode is not enabled")
+            return False
+        
+        try:
+            self._write_snapshot(self.snapshot_path)
+            self.snapshot_sequence = self.sequence
+            self.journal.reset()
+            return True
+        except Exception as e:
+            print(f"Error writing snapshot: {e}")
+            return False
+    
+    def close_journal(self):
+        """Snapshot and stop journaling"""
+        if self.journal:
+            self.snapshot()
+            self.journal.close()
+            self.journal = None
+    
     def get_total_deposits(self) -> float:
         """Get total deposits across all accounts"""
-        return sum(account.balance for account in self.accounts.values())
+        return self.total_balance
+    
+    def get_active_count(self) -> int:
+        return self.active_count
+    
+    def get_closed_count(self) -> int:
+        return len(self.accounts) - self.active_count
+    
+    def get_posting_volumes(self) -> Dict[str, float]:
+        """Total amount posted so far per transaction type"""
+        return dict(self.posting_volumes)
+    
+    def get_active_account_numbers(self) -> FrozenSet[str]:
+        """Numbers of the active accounts; the index is built by one scan on first call, then kept current"""
+        if self._active is None:
+            self._active = {account_number for account_number, _, is_active in self.accounts.scan() if is_active}
+        return frozenset(self._active)
     
     def __str__(self):
         return f"{self.bank_name} - Total Accounts: {len(self.accounts)} | Total Deposits: ${self.get_total_deposits():.2f}"
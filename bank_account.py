@@ -1,19 +1,238 @@
-from datetime import datetime
-from typing import List, Dict
+import tempfile
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Callable, List, Dict, Optional, Tuple
+
+# Posting types that add to the balance; every other type takes from it
+CREDIT_TYPES = ("INITIAL", "DEPOSIT", "TRANSFER_IN")
+# Histories store a posting type as its index in this tuple
+TRANSACTION_TYPES = ("INITIAL", "DEPOSIT", "WITHDRAWAL", "TRANSFER_IN", "TRANSFER_OUT")
+TYPE_CODES = {name: code for code, name in enumerate(TRANSACTION_TYPES)}
+# Histories store timestamps as microseconds since EPOCH
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Descriptions are interned: each distinct text is kept once, histories store its id
+_descriptions: List[str] = []
+_description_ids: Dict[str, int] = {}
+
+
+def intern_description(description: str) -> int:
+    description_id = _description_ids.get(description)
+    if description_id is None:
+        description_id = _description_ids[description] = len(_descriptions)
+        _descriptions.append(description)
+    return description_id
+
+
+def description_text(description_id: int) -> str:
+    return _descriptions[description_id]
 
 
 class Transaction:
-    """Represents a bank transaction"""
+    """Represents a bank transaction, as a view onto one row of a History (or of Columns read back from disk)"""
+    
+    __slots__ = ('_history', '_index')
+    
+    def __init__(self, transaction_type: str, amount: float, balance_after: float, description: str = "",
+                 timestamp: Optional[datetime] = None):
+        # A transaction built on its own is backed by a one-row history
+        history = History()
+        history.append(transaction_type, amount, balance_after, description, timestamp)
+        self._history = history
+        self._index = 0
+    
+    @classmethod
+    def _view(cls, history: 'Columns', index: int) -> 'Transaction':
+        transaction = cls.__new__(cls)
+        transaction._history = history
+        transaction._index = index
+        return transaction
+    
+    @property
+    def timestamp(self) -> datetime:
+        columns, index = self._history._locate(self._index)
+        return EPOCH + columns.timestamps[index] * MICROSECOND
+    
+    @property
+    def type(self) -> str:
+        columns, index = self._history._locate(self._index)
+        return TRANSACTION_TYPES[columns.types[index]]
+    
+    @property
+    def amount(self) -> float:
+        columns, index = self._history._locate(self._index)
+        return columns.amounts[index]
+    
+    @property
+    def balance_after(self) -> float:
+        columns, index = self._history._locate(self._index)
+        return columns.balances[index]
     
-    def __init__(self, transaction_type: str, amount: float, balance_after: float, description: str = ""):
-        self.timestamp = datetime.now()
-        self.type = transaction_type
-        self.amount = amount
-        self.balance_after = balance_after
-        self.description = description
+    @property
+    def description(self) -> str:
+        columns, index = self._history._locate(self._index)
+        return _descriptions[columns.descriptions[index]]
     
     def __str__(self):
         return f"[{self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}] {self.type}: ${self.amount:.2f} | Balance: ${self.balance_after:.2f} | {self.description}"
+    
+    def to_dict(self) -> Dict:
+        """Convert transaction to dictionary for storage"""
+        return {
+            'timestamp': self.timestamp.isoformat(),
+            'type': self.type,
+            'amount': self.amount,
+            'balance_after': self.balance_after,
+            'description': self.description
+        }
+
+
+class Columns:
+    """Rows of a history as parallel arrays: timestamp, type code, amount, balance after and description id"""
+    
+    __slots__ = ('timestamps', 'types', 'amounts', 'balances', 'descriptions')
+    
+    def __init__(self):
+        self.timestamps = array('q')
+        self.types = array('B')
+        self.amounts = array('d')
+        self.balances = array('d')
+        self.descriptions = array('I')
+    
+    def arrays(self) -> Tuple[array, ...]:
+        return self.timestamps, self.types, self.amounts, self.balances, self.descriptions
+    
+    def _locate(self, index: int) -> Tuple['Columns', int]:
+        return self, index
+    
+    def __len__(self) -> int:
+        return len(self.types)
+
+
+class SpillFile:
+    """Scratch file that bounded histories move their older rows to.
+    
+    Rows are appended in chunks, each written as its five columns back to
+    back. The file only lives as long as the process (it is an anonymous
+    temporary file), so description ids stay valid.
+    """
+    
+    def __init__(self, directory: Optional[str] = None):
+        self.file = tempfile.TemporaryFile(dir=directory)
+    
+    def write(self, columns: Columns, count: int) -> int:
+        """Append the first ``count`` rows of ``columns``; returns the chunk's offset"""
+        offset = self.file.seek(0, 2)
+        for column in columns.arrays():
+            self.file.write(memoryview(column)[:count])
+        return offset
+    
+    def read(self, offset: int, count: int) -> Columns:
+        chunk = Columns()
+        self.file.seek(offset)
+        for column in chunk.arrays():
+            column.frombytes(self.file.read(column.itemsize * count))
+        return chunk
+    
+    def close(self):
+        self.file.close()
+
+
+class History(Columns, Sequence):
+    """Transaction history of an account, stored column by column in arrays.
+    
+    A posting costs 29 bytes (timestamp, type code, amount, balance after and
+    description id); indexing and iterating hand out Transaction views.
+    
+    A history bounded with ``bound(window, spill)`` keeps at least the last
+    ``window`` rows, and never more than twice that, in memory: once it holds
+    ``2 * window`` rows the oldest ``window`` are moved to the spill file.
+    It still indexes and iterates over every row, reading older ones back
+    from disk a chunk at a time.
+    """
+    
+    __slots__ = ('window', 'spill', 'chunks', 'spilled', '_cached')
+    
+    def __init__(self):
+        super().__init__()
+        self.window: Optional[int] = None
+        self.spill: Optional[SpillFile] = None
+        # (first row, offset in the spill file, row count) per spilled chunk, oldest first
+        self.chunks: List[Tuple[int, int, int]] = []
+        self.spilled = 0
+        self._cached: Optional[Tuple[int, Columns]] = None
+    
+    def bound(self, window: int, spill: SpillFile):
+        """Keep only about the last ``window`` rows in memory from now on"""
+        self.window = window
+        self.spill = spill
+        if len(self.types) >= 2 * window:
+            self._spill(len(self.types) - window)
+    
+    def _spill(self, count: int):
+        offset = self.spill.write(self, count)
+        self.chunks.append((self.spilled, offset, count))
+        self.spilled += count
+        for column in self.arrays():
+            del column[:count]
+    
+    def _chunk(self, position: int) -> Columns:
+        _, offset, count = self.chunks[position]
+        if self._cached is None or self._cached[0] != position:
+            self._cached = (position, self.spill.read(offset, count))
+        return self._cached[1]
+    
+    def _locate(self, index: int) -> Tuple[Columns, int]:
+        if index >= self.spilled:
+            return self, index - self.spilled
+        position = bisect_right(self.chunks, (index, float('inf'))) - 1
+        return self._chunk(position), index - self.chunks[position][0]
+    
+    def append(self, transaction_type: str, amount: float, balance_after: float, description: str = "",
+               timestamp: Optional[datetime] = None) -> Transaction:
+        self.timestamps.append(((timestamp or datetime.now()) - EPOCH) // MICROSECOND)
+        self.types.append(TYPE_CODES[transaction_type])
+        self.amounts.append(amount)
+        self.balances.append(balance_after)
+        self.descriptions.append(intern_description(description))
+        transaction = Transaction._view(self, self.spilled + len(self.types) - 1)
+        if self.window and len(self.types) >= 2 * self.window:
+            self._spill(len(self.types) - self.window)
+        return transaction
+    
+    def columns(self) -> Columns:
+        """Every row, spilled or not, as one set of in-memory columns"""
+        if not self.chunks:
+            return self
+        everything = Columns()
+        for part in [self.spill.read(offset, count) for _, offset, count in self.chunks] + [self]:
+            for column, rows in zip(everything.arrays(), part.arrays()):
+                column.extend(rows)
+        return everything
+    
+    def __len__(self) -> int:
+        return self.spilled + len(self.types)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Transaction._view(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transaction index out of range")
+        return Transaction._view(self, index)
+    
+    def __iter__(self):
+        for _, offset, count in self.chunks:
+            chunk = self.spill.read(offset, count)
+            for index in range(count):
+                yield Transaction._view(chunk, index)
+        start = self.spilled
+        for index in range(len(self.types)):
+            yield Transaction._view(self, start + index)
 
 
 class Account:
@@ -23,13 +242,14 @@ class Account:
         self.account_number = account_number
         self.account_holder = account_holder
         self.balance = initial_balance
-        self.transactions: List[Transaction] = []
+        self.transactions = History()
         self.is_active = True
+        # Called as listener(account, transaction) after every posting, and with
+        # transaction=None when the account is closed
+        self.listener: Optional[Callable[['Account', Optional[Transaction]], None]] = None
         
         if initial_balance > 0:
-            self.transactions.append(
-                Transaction("INITIAL", initial_balance, self.balance, "Account opened")
-            )
+            self.transactions.append("INITIAL", initial_balance, self.balance, "Account opened")
     
     def deposit(self, amount: float, description: str = "") -> bool:
         """Deposit money into the account"""
@@ -41,10 +261,7 @@ class Account:
             print("Error: Account is closed")
             return False
         
-        self.balance += amount
-        self.transactions.append(
-            Transaction("DEPOSIT", amount, self.balance, description)
-        )
+        self._post("DEPOSIT", amount, description)
         print(f"Successfully deposited ${amount:.2f}. New balance: ${self.balance:.2f}")
         return True
     
@@ -62,37 +279,61 @@ class Account:
             print(f"Error: Insufficient funds. Current balance: ${self.balance:.2f}")
             return False
         
-        self.balance -= amount
-        self.transactions.append(
-            Transaction("WITHDRAWAL", amount, self.balance, description)
-        )
+        self._post("WITHDRAWAL", amount, description)
         print(f"Successfully withdrew ${amount:.2f}. New balance: ${self.balance:.2f}")
         return True
     
+    def _post(self, transaction_type: str, amount: float, description: str = "",
+              timestamp: Optional[datetime] = None) -> Transaction:
+        """Apply an already validated posting and record it (no checks, no output)"""
+        self.balance += amount if transaction_type in CREDIT_TYPES else -amount
+        transaction = self.transactions.append(transaction_type, amount, self.balance, description, timestamp)
+        if self.listener:
+            self.listener(self, transaction)
+        return transaction
+    
     def get_balance(self) -> float:
         """Get current account balance"""
         return self.balance
     
-    def get_transaction_history(self, limit: int = None) -> List[Transaction]:
-        """Get transaction history"""
+    def get_transaction_history(self, limit: int = None) -> Sequence:
+        """Get transaction history (views onto the account's History)"""
         if limit:
             return self.transactions[-limit:]
         return self.transactions
     
     def close_account(self):
         """Close the account"""
-        self.is_active = False
+        self._close()
         print(f"Account {self.account_number} has been closed")
     
+    def _close(self):
+        if self.is_active:
+            self.is_active = False
+            if self.listener:
+                self.listener(self, None)
+    
     def to_dict(self) -> Dict:
         """Convert account to dictionary for storage"""
         return {
             'account_number': self.account_number,
             'account_holder': self.account_holder,
             'balance': self.balance,
-            'is_active': self.is_active
+            'is_active': self.is_active,
+            'transactions': [transaction.to_dict() for transaction in self.transactions]
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Account':
+        """Rebuild an account saved with to_dict"""
+        account = cls(data['account_number'], data['account_holder'])
+        account.balance = data['balance']
+        account.is_active = data.get('is_active', True)
+        for item in data.get('transactions', []):
+            account.transactions.append(item['type'], item['amount'], item['balance_after'],
+                                        item.get('description', ''), datetime.fromisoformat(item['timestamp']))
+        return account
+    
     def __str__(self):
         status = "Active" if self.is_active else "Closed"
         return f"Account #{self.account_number} | {self.account_holder} | Balance: ${self.balance:.2f} | Status: {status}"
@@ -3,6 +3,8 @@
 Bank Management System - Command Line Interface
 """
 
+import argparse
+
 from bank import Bank
 from bank_account import Account
 
@@ -145,12 +147,23 @@ def bank_summary(bank: Bank):
     print(f"  BANK SUMMARY")
     print(f"{'='*50}")
     print(bank)
+    print(f"Active Accounts: {bank.get_active_count()} | Closed Accounts: {bank.get_closed_count()}")
+    for transaction_type, volume in bank.get_posting_volumes().items():
+        print(f"  {transaction_type:<13} ${volume:.2f}")
     print(f"{'='*50}")
 
 
 def main():
     """Main application loop"""
-    bank = Bank("MyBank")
+    parser = argparse.ArgumentParser(description="Bank Management System")
+    parser.add_argument("--data-dir", help="Recover from and journal every change to this directory")
+    parser.add_argument("--history-window", type=int,
+                        help="Keep only this many recent transactions per account in memory; older ones go to disk")
+    args = parser.parse_args()
+    
+    bank = Bank("MyBank", history_window=args.history_window)
+    if args.data_dir:
+        bank.open_journal(args.data_dir)
     
     print("\n*** Welcome to Bank Management System ***")
     
@@ -177,8 +190,11 @@ def main():
         elif choice == '9':
             bank_summary(bank)
         elif choice == '10':
-            filename = input("Enter filename to save (default: bank_data.json): ").strip()
-            bank.save_to_file(filename if filename else "bank_data.json")
+            filename = input("Enter filename to save (default: bank_data.json, .snap for a binary snapshot): ").strip()
+            if filename.endswith('.snap'):
+                bank.save_snapshot(filename)
+            else:
+                bank.save_to_file(filename if filename else "bank_data.json")
         elif choice == '11':
             filename = input("Enter filename to load (default: bank_data.json): ").strip()
             bank.load_from_file(filename if filename else "bank_data.json")
@@ -186,6 +202,7 @@ def main():
             save_prompt = input("Do you want to save data before exiting? (yes/no): ").strip().lower()
             if save_prompt == 'yes':
                 bank.save_to_file()
+            bank.close_journal()
             print("\nThank you for using Bank Management System!")
             print("Goodbye!")
             break
@@ -0,0 +1,55 @@
+import json
+import os
+from typing import Dict, Iterator
+
+
+class Journal:
+    """Append-only log of bank changes, one compact JSON record per line"""
+    
+    def __init__(self, path: str, sync: bool = False):
+        self.path = path
+        self.sync = sync
+        self.file = None
+    
+    def replay(self) -> Iterator[Dict]:
+        """Yield the records already in the journal.
+        
+        A record cut short by a crash ends the replay and is trimmed off, so
+        new records are never appended onto a torn line.
+        """
+        if not os.path.exists(self.path):
+            return
+        
+        valid = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid += len(line)
+                yield record
+        
+        if os.path.getsize(self.path) > valid:
+            os.truncate(self.path, valid)
+    
+    def append(self, record: Dict):
+        """Write one record; it survives a process crash once this returns"""
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+        self.file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.file.flush()
+        if self.sync:
+            os.fsync(self.file.fileno())
+    
+    def reset(self):
+        """Empty the journal once a snapshot covers everything in it"""
+        self.close()
+        self.file = open(self.path, 'w', encoding='utf-8')
+    
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
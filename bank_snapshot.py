@@ -0,0 +1,297 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import MutableMapping
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from bank_account import TRANSACTION_TYPES, Account, description_text, intern_description
+
+# Binary snapshot layout (all little-endian):
+#   header    HEADER, then TOTALS (posting count and volume per transaction
+#             type), then the bank name
+#   index     one KEY_SIZE-byte account number per account, sorted, NUL padded
+#   records   one RECORD per account, in index order: balance, is_active and
+#             where the account's blob sits in the data section
+#   data      one blob per account: holder name and transaction history,
+#             stored column by column (see encode_account)
+MAGIC = b'BANKSNAP'
+VERSION = 2
+HEADER = struct.Struct('<8sIIQQQdQQ')
+TOTALS = struct.Struct('<' + 'Qd' * len(TRANSACTION_TYPES))
+KEY_SIZE = 16
+RECORD = struct.Struct('<dBQQ')
+
+
+def _key(account_number: str) -> bytes:
+    key = account_number.encode('ascii')
+    if len(key) > KEY_SIZE:
+        raise ValueError(f"Account number {account_number} is longer than {KEY_SIZE} characters")
+    return key.ljust(KEY_SIZE, b'\0')
+
+
+def _pack_string(value: str) -> bytes:
+    data = value.encode('utf-8')
+    return struct.pack('<I', len(data)) + data
+
+
+def _unpack_string(blob, offset: int) -> Tuple[str, int]:
+    (length,) = struct.unpack_from('<I', blob, offset)
+    offset += 4
+    return bytes(blob[offset:offset + length]).decode('utf-8'), offset + length
+
+
+def encode_account(account: Account) -> bytes:
+    """Holder name and history of an account as one blob.
+    
+    The history's columns are written as they are (see bank_account.History),
+    except that description ids are renumbered into a list of the account's
+    own descriptions, stored after the columns.
+    """
+    history = account.transactions.columns()
+    local: Dict[int, int] = {}
+    description_ids = array('I', (local.setdefault(description_id, len(local))
+                                  for description_id in history.descriptions))
+    
+    parts = [_pack_string(account.account_holder), struct.pack('<II', len(history), len(local))]
+    for column in history.arrays()[:4] + (description_ids,):
+        if sys.byteorder == 'big' and column.itemsize > 1:
+            column = array(column.typecode, column)
+            column.byteswap()
+        parts.append(column.tobytes())
+    parts.extend(_pack_string(description_text(description_id)) for description_id in local)
+    return b''.join(parts)
+
+
+def decode_account(account_number: str, balance: float, is_active: bool, blob) -> Account:
+    """Rebuild an account from its record fields and blob"""
+    holder, offset = _unpack_string(blob, 0)
+    count, description_count = struct.unpack_from('<II', blob, offset)
+    offset += 8
+    
+    account = Account(account_number, holder)
+    account.balance = balance
+    account.is_active = is_active
+    history = account.transactions
+    local = array('I')
+    for column in history.arrays()[:4] + (local,):
+        size = column.itemsize * count
+        column.frombytes(blob[offset:offset + size])
+        if sys.byteorder == 'big' and column.itemsize > 1:
+            column.byteswap()
+        offset += size
+    description_ids = []
+    for _ in range(description_count):
+        description, offset = _unpack_string(blob, offset)
+        description_ids.append(intern_description(description))
+    history.descriptions = array('I', (description_ids[description_id] for description_id in local))
+    return account
+
+
+class Snapshot:
+    """Read-only view of a snapshot file through mmap; nothing is decoded up front"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, name_length, self.count, self.sequence, self.next_account_number,
+         self.total_balance, self.active_count, self.data_offset) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a bank snapshot")
+        name_offset = HEADER.size + TOTALS.size
+        self.bank_name = self.map[name_offset:name_offset + name_length].decode('utf-8')
+        self.index_offset = name_offset + name_length
+        self.records_offset = self.index_offset + self.count * KEY_SIZE
+        totals = TOTALS.unpack_from(self.map, HEADER.size)
+        self.posting_counts = dict(zip(TRANSACTION_TYPES, totals[0::2]))
+        self.posting_volumes = dict(zip(TRANSACTION_TYPES, totals[1::2]))
+    
+    @staticmethod
+    def is_snapshot(path: str) -> bool:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    
+    def key(self, position: int) -> bytes:
+        offset = self.index_offset + position * KEY_SIZE
+        return self.map[offset:offset + KEY_SIZE]
+    
+    def account_number(self, position: int) -> str:
+        return self.key(position).rstrip(b'\0').decode('ascii')
+    
+    def find(self, account_number: str) -> Optional[int]:
+        """Position of the account in the index (binary search), or None"""
+        try:
+            key = _key(account_number)
+        except (UnicodeEncodeError, ValueError):
+            return None
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self.key(low) == key:
+            return low
+        return None
+    
+    def record(self, position: int) -> Tuple[float, bool, int, int]:
+        """``(balance, is_active, blob_offset, blob_length)`` of the account at ``position``"""
+        balance, is_active, blob_offset, blob_length = RECORD.unpack_from(
+            self.map, self.records_offset + position * RECORD.size)
+        return balance, bool(is_active), blob_offset, blob_length
+    
+    def blob(self, position: int) -> memoryview:
+        _, _, blob_offset, blob_length = self.record(position)
+        return memoryview(self.map)[blob_offset:blob_offset + blob_length]
+    
+    def load_account(self, position: int) -> Account:
+        balance, is_active, _, _ = self.record(position)
+        return decode_account(self.account_number(position), balance, is_active, self.blob(position))
+    
+    def scan(self) -> Iterator[Tuple[str, float, bool]]:
+        """``(account_number, balance, is_active)`` of every account, straight from the mapped records"""
+        records = self.map[self.records_offset:self.records_offset + self.count * RECORD.size]
+        for position, (balance, is_active, _, _) in enumerate(RECORD.iter_unpack(records)):
+            yield self.account_number(position), balance, bool(is_active)
+    
+    def close(self):
+        self.map.close()
+
+
+class AccountTable(MutableMapping):
+    """The accounts of a bank, materialized from a snapshot on first access.
+    
+    Accounts that were never touched stay as bytes in the mapped snapshot;
+    ``on_load`` is called for each account as it is materialized.
+    """
+    
+    def __init__(self, snapshot: Optional[Snapshot] = None, on_load: Optional[Callable[[Account], None]] = None):
+        self.snapshot = snapshot
+        self.on_load = on_load
+        self.loaded: Dict[str, Account] = {}
+        # Snapshot balance and status of the loaded accounts that came from it
+        self.base: Dict[str, Tuple[float, bool]] = {}
+        self.added = 0
+    
+    def _position(self, account_number: str) -> Optional[int]:
+        return self.snapshot.find(account_number) if self.snapshot else None
+    
+    def _added(self):
+        """Numbers of the accounts that are not in the snapshot"""
+        return [account_number for account_number in self.loaded if account_number not in self.base]
+    
+    def __getitem__(self, account_number: str) -> Account:
+        account = self.loaded.get(account_number)
+        if account is not None:
+            return account
+        
+        position = self._position(account_number)
+        if position is None:
+            raise KeyError(account_number)
+        account = self.snapshot.load_account(position)
+        self.base[account_number] = (account.balance, account.is_active)
+        self.loaded[account_number] = account
+        if self.on_load:
+            self.on_load(account)
+        return account
+    
+    def __setitem__(self, account_number: str, account: Account):
+        if account_number not in self.loaded:
+            position = self._position(account_number)
+            if position is None:
+                self.added += 1
+            else:
+                self.base[account_number] = self.snapshot.record(position)[:2]
+        self.loaded[account_number] = account
+    
+    def __delitem__(self, account_number: str):
+        raise TypeError("Accounts cannot be removed from a bank")
+    
+    def __contains__(self, account_number) -> bool:
+        return account_number in self.loaded or self._position(account_number) is not None
+    
+    def __iter__(self) -> Iterator[str]:
+        if self.snapshot:
+            for position in range(self.snapshot.count):
+                yield self.snapshot.account_number(position)
+        for account_number in self._added():
+            yield account_number
+    
+    def __len__(self) -> int:
+        return (self.snapshot.count if self.snapshot else 0) + self.added
+    
+    def scan(self) -> Iterator[Tuple[str, float, bool]]:
+        """``(account_number, balance, is_active)`` of every account, building only what is already loaded"""
+        if self.snapshot:
+            for account_number, balance, is_active in self.snapshot.scan():
+                account = self.loaded.get(account_number)
+                if account is not None:
+                    balance, is_active = account.balance, account.is_active
+                yield account_number, balance, is_active
+        for account_number in self._added():
+            account = self.loaded[account_number]
+            yield account_number, account.balance, account.is_active
+    
+    def rebase(self, snapshot: Snapshot):
+        """Switch to a snapshot that was written from this table"""
+        self.close()
+        self.snapshot = snapshot
+        self.base = {number: (account.balance, account.is_active) for number, account in self.loaded.items()}
+        self.added = 0
+    
+    def close(self):
+        if self.snapshot:
+            self.snapshot.close()
+            self.snapshot = None
+
+
+def write_snapshot(path: str, bank_name: str, next_account_number: int, sequence: int, table: AccountTable,
+                   posting_counts: Dict[str, int], posting_volumes: Dict[str, float]) -> str:
+    """Write the table's accounts to a new file next to ``path`` and return its name.
+    
+    Loaded accounts are encoded afresh; the others are copied over byte for
+    byte from the table's current snapshot. The caller moves the file into
+    place once that snapshot is closed.
+    """
+    old = table.snapshot
+    # Snapshot positions and newly added accounts, merged in key order
+    entries = [(old.key(position), position) for position in range(old.count)] if old else []
+    entries += [(_key(account_number), account_number) for account_number in table._added()]
+    entries.sort(key=lambda entry: entry[0])
+    
+    name = bank_name.encode('utf-8')
+    data_offset = HEADER.size + TOTALS.size + len(name) + len(entries) * (KEY_SIZE + RECORD.size)
+    index, records = bytearray(), bytearray()
+    total_balance, active_count = 0.0, 0
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.seek(data_offset)
+        for key, entry in entries:
+            account_number = key.rstrip(b'\0').decode('ascii')
+            account = table.loaded.get(account_number)
+            if account is not None:
+                balance, is_active, blob = account.balance, account.is_active, encode_account(account)
+            else:
+                balance, is_active, _, _ = old.record(entry)
+                blob = old.blob(entry)
+            index += key
+            records += RECORD.pack(balance, is_active, f.tell(), len(blob))
+            f.write(blob)
+            total_balance += balance
+            active_count += is_active
+        
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(name), len(entries), sequence, next_account_number,
+                            total_balance, active_count, data_offset))
+        f.write(TOTALS.pack(*(value for transaction_type in TRANSACTION_TYPES
+                              for value in (posting_counts.get(transaction_type, 0),
+                                            posting_volumes.get(transaction_type, 0.0)))))
+        f.write(name)
+        f.write(index)
+        f.write(records)
+        f.flush()
+        os.fsync(f.fileno())
+    return temp_path
@@ -0,0 +1,62 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+
+from .routing import use_primary
+
+# Version scope shared by every account listing
+LIST_SCOPE = 'list'
+
+
+def _version_key(scope):
+    return f'account-version:{scope}'
+
+
+def version(scope):
+    """Current version of ``scope`` (an account number or LIST_SCOPE).
+    
+    A missing counter is seeded from the clock rather than from zero, so a
+    counter that was evicted can never come back to a version whose entries
+    are still cached.
+    """
+    key = _version_key(scope)
+    current = cache.get(key)
+    if current is None:
+        cache.add(key, time.time_ns(), None)
+        current = cache.get(key)
+    return current
+
+
+def _bump(scopes):
+    for scope in scopes:
+        try:
+            cache.incr(_version_key(scope))
+        except ValueError:
+            # Nothing cached under this scope yet
+            cache.add(_version_key(scope), time.time_ns(), None)
+
+
+def invalidate(account_numbers):
+    """Retire cached reads of the given accounts (and of the listings) once the write commits"""
+    scopes = {str(number) for number in account_numbers}
+    scopes.add(LIST_SCOPE)
+    db_transaction.on_commit(lambda: _bump(scopes))
+
+
+def get_or_render(scope, variant, render):
+    """Cached ``render()`` result for ``variant`` of ``scope`` at its current version.
+    
+    Misses are rendered from the primary: a lagging replica could otherwise
+    store old data under the new version.
+    """
+    digest = hashlib.md5(variant.encode()).hexdigest()
+    key = f'account-read:{scope}:{version(scope)}:{digest}'
+    value = cache.get(key)
+    if value is None:
+        with use_primary():
+            value = render()
+        cache.set(key, value, settings.BANK_ACCOUNT_CACHE_TTL)
+    return value
@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .api_views import AccountViewSet, TransactionViewSet, transfer, bank_summary
+from .api_views import (
+    AccountViewSet, TransactionViewSet, transfer, batch_postings, daily_rollups, bank_summary, dashboard,
+    event_stream
+)
 
 router = DefaultRouter()
 router.register(r'accounts', AccountViewSet, basename='account')
@@ -9,6 +12,10 @@ router.register(r'transactions', TransactionViewSet, basename='transaction')
 urlpatterns = [
     path('api/', include(router.urls)),
     path('api/transfer/', transfer, name='api-transfer'),
+    path('api/postings/batch/', batch_postings, name='api-postings-batch'),
+    path('api/rollups/daily/', daily_rollups, name='api-daily-rollups'),
     path('api/summary/', bank_summary, name='api-summary'),
+    path('api/dashboard/', dashboard, name='api-dashboard'),
+    path('api/events/', event_stream, name='api-events'),
 ]
 
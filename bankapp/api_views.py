@@ -1,160 +1,365 @@
-from rest_framework import viewsets, status
-from rest_framework.decorators import action, api_view
-from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
-from django.db import transaction as db_transaction
-from .models import Account, Transaction
-from .serializers import (
-    AccountSerializer, AccountListSerializer, CreateAccountSerializer,
-    TransactionSerializer, DepositSerializer, WithdrawSerializer, TransferSerializer
-)
-
-
-class AccountViewSet(viewsets.ModelViewSet):
-    """ViewSet for Account operations"""
-    queryset = Account.objects.all()
-    
-    def get_serializer_class(self):
-        if self.action == 'create':
-            return CreateAccountSerializer
-        elif self.action == 'list':
-            return AccountListSerializer
-        return AccountSerializer
-    
-    def get_queryset(self):
-        queryset = Account.objects.all()
-        is_active = self.request.query_params.get('is_active', None)
-        if is_active is not None:
-            queryset = queryset.filter(is_active=is_active.lower() == 'true')
-        return queryset.order_by('-created_at')
-    
-    def create(self, request, *args, **kwargs):
-        serializer = CreateAccountSerializer(data=request.data)
-        if serializer.is_valid():
-            account = serializer.save()
-            return Response(AccountSerializer(account).data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    @action(detail=True, methods=['post'])
-    def deposit(self, request, pk=None):
-        """Deposit money into an account"""
-        account = self.get_object()
-        serializer = DepositSerializer(data=request.data)
-        
-        if serializer.is_valid():
-            try:
-                account.deposit(
-                    serializer.validated_data['amount'],
-                    serializer.validated_data.get('description', '')
-                )
-                return Response({
-                    'message': f'Successfully deposited ${serializer.validated_data["amount"]}',
-                    'account': AccountSerializer(account).data
-                }, status=status.HTTP_200_OK)
-            except ValueError as e:
-                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    @action(detail=True, methods=['post'])
-    def withdraw(self, request, pk=None):
-        """Withdraw money from an account"""
-        account = self.get_object()
-        serializer = WithdrawSerializer(data=request.data)
-        
-        if serializer.is_valid():
-            try:
-                account.withdraw(
-                    serializer.validated_data['amount'],
-                    serializer.validated_data.get('description', '')
-                )
-                return Response({
-                    'message': f'Successfully withdrew ${serializer.validated_data["amount"]}',
-                    'account': AccountSerializer(account).data
-                }, status=status.HTTP_200_OK)
-            except ValueError as e:
-                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    @action(detail=True, methods=['post'])
-    def close(self, request, pk=None):
-        """Close an account"""
-        account = self.get_object()
-        if not account.is_active:
-            return Response({'error': 'Account is already closed'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        account.close_account()
-        return Response({
-            'message': f'Account {account.account_number} has been closed',
-            'account': AccountSerializer(account).data
-        }, status=status.HTTP_200_OK)
-    
-    @action(detail=True, methods=['get'])
-    def transactions(self, request, pk=None):
-        """Get transactions for an account"""
-        account = self.get_object()
-        transactions = account.transactions.all()[:50]
-        serializer = TransactionSerializer(transactions, many=True)
-        return Response(serializer.data)
-
-
-class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet for Transaction operations (read-only)"""
-    queryset = Transaction.objects.all()
-    serializer_class = TransactionSerializer
-    
-    def get_queryset(self):
-        queryset = Transaction.objects.all()
-        account_number = self.request.query_params.get('account', None)
-        if account_number:
-            queryset = queryset.filter(account__account_number=account_number)
-        return queryset.order_by('-timestamp')
-
-
-@api_view(['POST'])
-def transfer(request):
-    """Transfer money between accounts"""
-    serializer = TransferSerializer(data=request.data)
-    
-    if serializer.is_valid():
-        from_account = get_object_or_404(Account, account_number=serializer.validated_data['from_account'])
-        to_account = get_object_or_404(Account, account_number=serializer.validated_data['to_account'])
-        amount = serializer.validated_data['amount']
-        
-        try:
-            with db_transaction.atomic():
-                # Withdraw from source
-                from_account.withdraw(amount, f'Transfer to account {to_account.account_number}')
-                
-                # Deposit to destination
-                to_account.deposit(amount, f'Transfer from account {from_account.account_number}')
-            
-            return Response({
-                'message': f'Successfully transferred ${amount} from account {from_account.account_number} to {to_account.account_number}',
-                'from_account': AccountSerializer(from_account).data,
-                'to_account': AccountSerializer(to_account).data
-            }, status=status.HTTP_200_OK)
-        except ValueError as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-    
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-
-@api_view(['GET'])
-def bank_summary(request):
-    """Get bank summary statistics"""
-    from django.db.models import Sum, Count
-    
-    total_accounts = Account.objects.count()
-    active_accounts = Account.objects.filter(is_active=True).count()
-    total_deposits = Account.objects.aggregate(total=Sum('balance'))['total'] or 0
-    total_transactions = Transaction.objects.count()
-    
-    return Response({
-        'total_accounts': total_accounts,
-        'active_accounts': active_accounts,
-        'total_deposits': float(total_deposits),
-        'total_transactions': total_transactions
-    })
-
+from rest_framework import viewsets, status
+from rest_framework.decorators import action, api_view
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.db import router
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from . import account_cache, archive, dashboard as bank_dashboard
+from .idempotency import idempotent
+from .importing import detect_format, read_rows, text_stream, import_accounts
+from .models import Account, Transaction, BankSummary, DailyRollup
+from .pagination import ArchivePagination, TransactionCursorPagination
+from . import events, statements
+from .serializers import (
+    AccountSerializer, AccountListSerializer, AccountBalanceSerializer, CreateAccountSerializer,
+    TransactionSerializer, DepositSerializer, WithdrawSerializer, TransferSerializer,
+    BatchPostingSerializer, AccountImportSerializer, DailyRollupSerializer
+)
+
+
+class AccountViewSet(viewsets.ModelViewSet):
+    """ViewSet for Account operations"""
+    queryset = Account.objects.all()
+    
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return CreateAccountSerializer
+        elif self.action == 'list':
+            return AccountListSerializer
+        return AccountSerializer
+    
+    def get_queryset(self):
+        queryset = Account.objects.all()
+        is_active = self.request.query_params.get('is_active', None)
+        if is_active is not None:
+            queryset = queryset.filter(is_active=is_active.lower() == 'true')
+        return queryset.order_by('-created_at')
+    
+    def cached_json(self, scope, render):
+        """Serve ``render()``'s JSON body from the versioned account cache"""
+        if self.request.accepted_renderer.format != 'json':
+            return render()
+        
+        def rendered():
+            return JSONRenderer().render(render().data)
+        
+        content = account_cache.get_or_render(scope, self.request.build_absolute_uri(), rendered)
+        return HttpResponse(content, content_type='application/json')
+    
+    def list(self, request, *args, **kwargs):
+        return self.cached_json(account_cache.LIST_SCOPE, lambda: super(AccountViewSet, self).list(request, *args, **kwargs))
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_json(kwargs['pk'], lambda: super(AccountViewSet, self).retrieve(request, *args, **kwargs))
+    
+    def create(self, request, *args, **kwargs):
+        serializer = CreateAccountSerializer(data=request.data)
+        if serializer.is_valid():
+            account = serializer.save()
+            return Response(AccountSerializer(account, context=self.get_serializer_context()).data,
+                            status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_accounts(self, request):
+        """Bulk-create accounts from an uploaded CSV or NDJSON file"""
+        serializer = AccountImportSerializer(data=request.data)
+        
+        if serializer.is_valid():
+            upload = serializer.validated_data['file']
+            fmt = serializer.validated_data.get('format') or detect_format(upload.name)
+            rows = read_rows(text_stream(upload.file), fmt)
+            stats = import_accounts(rows, settings.BANK_IMPORT_CHUNK_SIZE)
+            return Response(stats, status=status.HTTP_201_CREATED)
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['post'])
+    @idempotent
+    def deposit(self, request, pk=None):
+        """Deposit money into an account"""
+        account = self.get_object()
+        serializer = DepositSerializer(data=request.data)
+        
+        if serializer.is_valid():
+            try:
+                account.deposit(
+                    serializer.validated_data['amount'],
+                    serializer.validated_data.get('description', '')
+                )
+                return Response({
+                    'message': f'Successfully deposited ${serializer.validated_data["amount"]}',
+                    'account': AccountBalanceSerializer(account).data,
+                    'transaction': TransactionSerializer(account.last_transaction).data
+                }, status=status.HTTP_200_OK)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['post'])
+    @idempotent
+    def withdraw(self, request, pk=None):
+        """Withdraw money from an account"""
+        account = self.get_object()
+        serializer = WithdrawSerializer(data=request.data)
+        
+        if serializer.is_valid():
+            try:
+                account.withdraw(
+                    serializer.validated_data['amount'],
+                    serializer.validated_data.get('description', '')
+                )
+                return Response({
+                    'message': f'Successfully withdrew ${serializer.validated_data["amount"]}',
+                    'account': AccountBalanceSerializer(account).data,
+                    'transaction': TransactionSerializer(account.last_transaction).data
+                }, status=status.HTTP_200_OK)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['post'])
+    def close(self, request, pk=None):
+        """Close an account"""
+        account = self.get_object()
+        if not account.is_active:
+            return Response({'error': 'Account is already closed'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        account.close_account()
+        return Response({
+            'message': f'Account {account.account_number} has been closed',
+            'account': AccountBalanceSerializer(account).data
+        }, status=status.HTTP_200_OK)
+    
+    @action(detail=True, methods=['get'])
+    def transactions(self, request, pk=None):
+        """Get transactions for an account, newest first, one cursor page at a time (optionally between ``from`` and ``to``).
+        
+        Once the hot rows run out, the ``next`` links continue into the archive.
+        """
+        account = self.get_object()
+        archived = ArchivePagination(request, archive.current())
+        try:
+            start, end = statements.window(request.query_params)
+            position = archived.get_position()
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        cutoff = archived.archive.cutoff
+        if position or (cutoff and end and end <= cutoff):
+            rows, next_link = archived.paginate(account.pk, position, start, end)
+            page = [Transaction(account=account, **row) for row in rows]
+            return archived.get_paginated_response(TransactionSerializer(page, many=True).data, next_link)
+        
+        hot = statements.within(account.transactions.all(), max(filter(None, [start, cutoff]), default=None), end)
+        paginator = TransactionCursorPagination()
+        page = paginator.paginate_queryset(hot, request, view=self)
+        serializer = TransactionSerializer(page, many=True)
+        response = paginator.get_paginated_response(serializer.data)
+        if cutoff and not paginator.has_next and archived.archive.holds(account.pk, start, end):
+            response.data['next'] = archived.get_first_link()
+        return response
+    
+    @action(detail=True, methods=['get'])
+    def balance(self, request, pk=None):
+        """Get the account balance as of a date or datetime (default: now)"""
+        account = self.get_object()
+        try:
+            as_of = statements.parse_bound(request.query_params.get('as_of'), end=True)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if as_of is None:
+            return Response({
+                'account_number': account.account_number,
+                'as_of': timezone.now(),
+                'balance': str(account.balance)
+            })
+        
+        return Response({
+            'account_number': account.account_number,
+            'as_of': as_of,
+            'balance': str(account.balance_at(as_of))
+        })
+    
+    @action(detail=True, methods=['get'])
+    def rollups(self, request, pk=None):
+        """Get the account's daily posting rollups between ``from`` and ``to``"""
+        account = self.get_object()
+        return rollup_response(request, account.daily_rollups.all())
+    
+    @action(detail=True, methods=['get'], url_path=r'statement\.(?P<fmt>csv|ndjson)')
+    def statement(self, request, pk=None, fmt=None):
+        """Stream the account's transactions between ``from`` and ``to`` as CSV or NDJSON"""
+        account = self.get_object()
+        try:
+            start, end = statements.window(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # The rows are read while the response streams, after ReplicaMiddleware
+        # has returned: pick the database now, while this request's routing applies
+        rows = statements.statement_rows(account, start, end, using=router.db_for_read(Transaction))
+        response = StreamingHttpResponse(statements.RENDERERS[fmt](rows), content_type=statements.FORMATS[fmt])
+        response['Content-Disposition'] = f'attachment; filename="statement-{account.account_number}.{fmt}"'
+        return response
+
+
+class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for Transaction operations (read-only)"""
+    queryset = Transaction.objects.all()
+    serializer_class = TransactionSerializer
+    pagination_class = TransactionCursorPagination
+    window = (None, None)
+    
+    def list(self, request, *args, **kwargs):
+        try:
+            self.window = statements.window(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return super().list(request, *args, **kwargs)
+    
+    def get_queryset(self):
+        queryset = statements.within(Transaction.objects.all(), *self.window)
+        account_number = self.request.query_params.get('account', None)
+        if account_number:
+            queryset = queryset.filter(account_id=account_number)
+        return queryset
+
+
+@api_view(['POST'])
+@idempotent
+def transfer(request):
+    """Transfer money between accounts"""
+    serializer = TransferSerializer(data=request.data)
+    
+    if serializer.is_valid():
+        amount = serializer.validated_data['amount']
+        
+        try:
+            from_account, to_account = Account.transfer(
+                serializer.validated_data['from_account'],
+                serializer.validated_data['to_account'],
+                amount
+            )
+            
+            return Response({
+                'message': f'Successfully transferred ${amount} from account {from_account.account_number} to {to_account.account_number}',
+                'from_account': AccountBalanceSerializer(from_account).data,
+                'to_account': AccountBalanceSerializer(to_account).data,
+                'transactions': TransactionSerializer(
+                    [from_account.last_transaction, to_account.last_transaction], many=True
+                ).data
+            }, status=status.HTTP_200_OK)
+        except Account.DoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+def batch_postings(request):
+    """Apply a batch of deposits/withdrawals, returning a result per posting"""
+    serializer = BatchPostingSerializer(data=request.data)
+    
+    if serializer.is_valid():
+        results = Account.post_batch(serializer.validated_data['postings'])
+        for result in results:
+            if 'balance_after' in result:
+                result['balance_after'] = str(result['balance_after'])
+        succeeded = sum(1 for result in results if result['status'] == 'ok')
+        
+        return Response({
+            'processed': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results
+        }, status=status.HTTP_200_OK)
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+def daily_rollups(request):
+    """Get bank-wide daily posting totals per transaction type between ``from`` and ``to``"""
+    rollups = DailyRollup.objects.all()
+    account_number = request.query_params.get('account')
+    if account_number:
+        rollups = rollups.filter(account_id=account_number)
+    return rollup_response(request, rollups)
+
+
+def rollup_response(request, rollups):
+    """Filter rollups by the ``from``/``to``/``type`` query params and sum them per day and type"""
+    filters = {}
+    for param, lookup in (('from', 'date__gte'), ('to', 'date__lte')):
+        value = request.query_params.get(param)
+        if value:
+            day = parse_date(value)
+            if day is None:
+                return Response({'error': f'Invalid date: {value}'}, status=status.HTTP_400_BAD_REQUEST)
+            filters[lookup] = day
+    transaction_type = request.query_params.get('type')
+    if transaction_type:
+        filters['transaction_type'] = transaction_type
+    
+    totals = (
+        rollups.filter(**filters).order_by('date', 'transaction_type')
+        .values('date', 'transaction_type')
+        .annotate(count=Sum('count'), total=Sum('total'))
+    )
+    return Response(DailyRollupSerializer(totals, many=True).data)
+
+
+@api_view(['GET'])
+def bank_summary(request):
+    """Get bank summary statistics"""
+    summary = BankSummary.current()
+    
+    return Response({
+        'total_accounts': summary['total_accounts'],
+        'active_accounts': summary['active_accounts'],
+        'total_deposits': float(summary['total_deposits']),
+        'total_transactions': summary['total_transactions']
+    })
+
+
+@api_view(['GET'])
+def dashboard(request):
+    """Get all dashboard series in one payload (``days`` sets the activity window, default 7)"""
+    try:
+        days = int(request.query_params.get('days', 7))
+    except ValueError:
+        days = 0
+    if not 1 <= days <= 366:
+        return Response({'error': 'days must be between 1 and 366'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(bank_dashboard.current(days))
+
+
+async def event_stream(request):
+    """Server-Sent Events feed of postings for the ``account`` query params (every account if none)"""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if not isinstance(request, ASGIRequest):
+        # A WSGI server would try to drain the endless stream and hold a worker forever
+        return JsonResponse({'error': 'The event feed is only served under ASGI (e.g. uvicorn)'}, status=501)
+    
+    topics = request.GET.getlist('account')
+    response = StreamingHttpResponse(
+        events.sse_stream(topics, settings.BANK_EVENT_HEARTBEAT, settings.BANK_EVENT_MAX_AGE),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
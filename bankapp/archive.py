@@ -0,0 +1,222 @@
+import gzip
+import json
+import os
+from array import array
+from datetime import timedelta
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import account_cache
+
+# Cold storage for old ledger rows. Each segment is a gzip file holding one
+# compressed member of NDJSON rows per account, so one account's rows are read
+# with a single seek. manifest.json lists the segments with per-account
+# offsets and first/last timestamps, and the cutoff: every row older than it
+# lives in the archive, every newer row in the hot table.
+MANIFEST = 'manifest.json'
+# Ids of the rows a segment holds that may still be in the hot table, kept next
+# to the segment until they are deleted (see archive_transactions)
+PENDING_IDS = '{}.ids'
+FIELDS = ['id', 'timestamp', 'transaction_type', 'amount', 'balance_after', 'description']
+
+
+def _encode(row):
+    return {**row, 'timestamp': row['timestamp'].isoformat(), 'amount': str(row['amount']),
+            'balance_after': str(row['balance_after'])}
+
+
+def _decode(line):
+    row = json.loads(line)
+    row['timestamp'] = parse_datetime(row['timestamp'])
+    row['amount'] = Decimal(row['amount'])
+    row['balance_after'] = Decimal(row['balance_after'])
+    return row
+
+
+def _write_atomic(path, data):
+    with open(f'{path}.tmp', 'wb') as out:
+        out.write(data)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(f'{path}.tmp', path)
+
+
+def _delete_pending(Transaction, path, chunk_size):
+    """Delete the hot rows whose ids were saved at ``path`` by an archival, then drop the file"""
+    if not os.path.exists(path):
+        return 0
+    ids = array('q')
+    with open(path, 'rb') as stream:
+        ids.frombytes(stream.read())
+    deleted = 0
+    for start in range(0, len(ids), chunk_size):
+        deleted += Transaction.objects.filter(pk__in=ids[start:start + chunk_size].tolist()).delete()[0]
+    os.remove(path)
+    return deleted
+
+
+class Archive:
+    """Read access to an archive directory as described by its manifest"""
+    
+    def __init__(self, directory, manifest=None):
+        self.directory = directory
+        self.manifest = manifest or {'cutoff': None, 'segments': []}
+        self.cutoff = parse_datetime(self.manifest['cutoff']) if self.manifest['cutoff'] else None
+    
+    @classmethod
+    def load(cls, directory):
+        try:
+            with open(os.path.join(directory, MANIFEST), encoding='utf-8') as stream:
+                return cls(directory, json.load(stream))
+        except FileNotFoundError:
+            return cls(directory)
+    
+    def _blocks(self, account_number, start=None, end=None):
+        """``(segment, entry)`` for each block of the account overlapping ``start <= timestamp < end``"""
+        for segment in self.manifest['segments']:
+            entry = segment['accounts'].get(str(account_number))
+            if entry is None:
+                continue
+            if start and parse_datetime(entry['last']) < start:
+                continue
+            if end and parse_datetime(entry['first']) >= end:
+                continue
+            yield segment, entry
+    
+    def _read(self, segment, entry):
+        with open(os.path.join(self.directory, segment['file']), 'rb') as stream:
+            stream.seek(entry['offset'])
+            data = gzip.decompress(stream.read(entry['length']))
+        return [_decode(line) for line in data.decode('utf-8').splitlines()]
+    
+    def holds(self, account_number, start=None, end=None):
+        """Whether any archived row of the account may fall in the window"""
+        return next(self._blocks(account_number, start, end), None) is not None
+    
+    def rows(self, account_number, start=None, end=None, newest_first=False):
+        """Archived rows of the account with ``start <= timestamp < end``, oldest first by default"""
+        blocks = list(self._blocks(account_number, start, end))
+        if newest_first:
+            blocks.reverse()
+        for segment, entry in blocks:
+            rows = self._read(segment, entry)
+            if newest_first:
+                rows.reverse()
+            for row in rows:
+                if (start is None or row['timestamp'] >= start) and (end is None or row['timestamp'] < end):
+                    yield row
+    
+    def balance_before(self, account_number, before):
+        """``(timestamp, balance_after)`` of the account's last archived row before ``before``, or None"""
+        for segment, entry in reversed(list(self._blocks(account_number, end=before))):
+            if parse_datetime(entry['last']) < before:
+                return parse_datetime(entry['last']), Decimal(entry['last_balance'])
+            earlier = [row for row in self._read(segment, entry) if row['timestamp'] < before]
+            if earlier:
+                return earlier[-1]['timestamp'], earlier[-1]['balance_after']
+        return None
+
+
+_loaded = {}
+
+
+def current():
+    """The archive in BANK_ARCHIVE_DIR, re-read whenever its manifest changes"""
+    directory = str(settings.BANK_ARCHIVE_DIR)
+    try:
+        version = os.stat(os.path.join(directory, MANIFEST)).st_mtime_ns
+    except FileNotFoundError:
+        version = None
+    if directory not in _loaded or _loaded[directory][0] != version:
+        _loaded[directory] = (version, Archive.load(directory))
+    return _loaded[directory][1]
+
+
+def archive_transactions(before, directory=None, chunk_size=None, progress=None):
+    """Move ledger rows older than ``before`` out of the hot table into a new segment.
+    
+    The segment and the ids of its rows are written first, then the manifest
+    is replaced with the new cutoff, then exactly those ids are deleted in
+    chunks. Readers only take rows older than the cutoff from the archive, so
+    rows that are already archived but not yet deleted are never listed
+    twice; if a run is interrupted, the next one finishes deleting them from
+    the saved ids. ``before`` must be at least BANK_ARCHIVE_SAFETY_MARGIN in
+    the past, so no posting can still land behind the cutoff. Run one
+    archival at a time.
+    """
+    Transaction = apps.get_model('bankapp', 'Transaction')
+    directory = str(directory or settings.BANK_ARCHIVE_DIR)
+    chunk_size = chunk_size or settings.BANK_STATEMENT_CHUNK_SIZE
+    latest = timezone.now() - timedelta(seconds=settings.BANK_ARCHIVE_SAFETY_MARGIN)
+    if before > latest:
+        raise ValueError(f"Cannot archive rows newer than {latest.isoformat()} "
+                         f"(BANK_ARCHIVE_SAFETY_MARGIN before now)")
+    os.makedirs(directory, exist_ok=True)
+    archive = Archive.load(directory)
+    if archive.cutoff and before <= archive.cutoff:
+        raise ValueError(f"Rows before {archive.cutoff.isoformat()} are already archived")
+    
+    deleted = 0
+    for segment in archive.manifest['segments']:
+        deleted += _delete_pending(Transaction, os.path.join(directory, PENDING_IDS.format(segment['file'])),
+                                   chunk_size)
+    
+    ledger = Transaction.objects.filter(timestamp__lt=before)
+    if archive.cutoff:
+        ledger = ledger.filter(timestamp__gte=archive.cutoff)
+    rows = ledger.order_by('account_id', 'timestamp', 'id').values_list('account_id', *FIELDS)
+    
+    name = f"segment-{before.strftime('%Y%m%dT%H%M%S')}.ndjson.gz"
+    path = os.path.join(directory, name)
+    accounts = {}
+    ids = array('q')
+    with open(f'{path}.tmp', 'wb') as out:
+        for account_number, group in groupby(rows.iterator(chunk_size=chunk_size), key=itemgetter(0)):
+            block = [dict(zip(FIELDS, values[1:])) for values in group]
+            ids.extend(row['id'] for row in block)
+            data = gzip.compress(''.join(json.dumps(_encode(row)) + '\n' for row in block).encode('utf-8'),
+                                 compresslevel=6)
+            accounts[account_number] = {
+                'offset': out.tell(),
+                'length': len(data),
+                'rows': len(block),
+                'first': block[0]['timestamp'].isoformat(),
+                'last': block[-1]['timestamp'].isoformat(),
+                'last_balance': str(block[-1]['balance_after']),
+            }
+            out.write(data)
+            if progress:
+                progress(account_number, len(block))
+        out.flush()
+        os.fsync(out.fileno())
+    
+    archived = sum(entry['rows'] for entry in accounts.values())
+    manifest = archive.manifest
+    if accounts:
+        _write_atomic(PENDING_IDS.format(path), ids.tobytes())
+        os.replace(f'{path}.tmp', path)
+        manifest['segments'].append({
+            'file': name,
+            'start': manifest['cutoff'],
+            'end': before.isoformat(),
+            'rows': archived,
+            'accounts': accounts,
+        })
+    else:
+        os.remove(f'{path}.tmp')
+    manifest['cutoff'] = before.isoformat()
+    _write_atomic(os.path.join(directory, MANIFEST), json.dumps(manifest, indent=1).encode('utf-8'))
+    
+    if accounts:
+        deleted += _delete_pending(Transaction, PENDING_IDS.format(path), chunk_size)
+    # Embedded recent transactions of these accounts may have moved to the archive
+    account_cache.invalidate(accounts)
+    
+    return {'segment': name if accounts else None, 'archived': archived, 'accounts': len(accounts),
+            'deleted': deleted, 'cutoff': before}
@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Account, BankSummary, DailyRollup, Transaction
+
+INFLOW_TYPES = ('INITIAL', 'DEPOSIT', 'TRANSFER_IN')
+OUTFLOW_TYPES = ('WITHDRAWAL', 'TRANSFER_OUT')
+BALANCE_BUCKETS = [
+    ('0-100', 0, 100),
+    ('100-1K', 100, 1000),
+    ('1K-10K', 1000, 10000),
+    ('10K-100K', 10000, 100000),
+    ('100K+', 100000, None),
+]
+TOP_ACCOUNTS = 5
+RECENT_TRANSACTIONS = 10
+MONTHS = 6
+
+
+def _flows():
+    return {
+        'deposits': Sum('total', filter=Q(transaction_type__in=INFLOW_TYPES)),
+        'withdrawals': Sum('total', filter=Q(transaction_type__in=OUTFLOW_TYPES)),
+        'transactions': Sum('count'),
+    }
+
+
+def _as_float(value):
+    return float(value or 0)
+
+
+def activity(days):
+    """Inflow, outflow and posting count per day for the last ``days`` days, oldest first"""
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    rows = {
+        row['date']: row
+        for row in DailyRollup.objects.filter(date__gte=start).order_by().values('date').annotate(**_flows())
+    }
+    series = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = rows.get(day, {})
+        series.append({
+            'date': day.isoformat(),
+            'deposits': _as_float(row.get('deposits')),
+            'withdrawals': _as_float(row.get('withdrawals')),
+            'transactions': row.get('transactions') or 0,
+        })
+    return series
+
+
+def monthly():
+    """Inflow, outflow and posting count per calendar month for the last MONTHS months"""
+    start = timezone.localdate().replace(day=1)
+    for _ in range(MONTHS - 1):
+        start = (start - timedelta(days=1)).replace(day=1)
+    rows = (
+        DailyRollup.objects.filter(date__gte=start)
+        .annotate(month=TruncMonth('date')).order_by('month')
+        .values('month').annotate(**_flows())
+    )
+    return [{
+        'month': row['month'].strftime('%Y-%m'),
+        'deposits': _as_float(row['deposits']),
+        'withdrawals': _as_float(row['withdrawals']),
+        'transactions': row['transactions'] or 0,
+    } for row in rows]
+
+
+def type_breakdown(days):
+    """Posting count and volume per transaction type over the last ``days`` days"""
+    start = timezone.localdate() - timedelta(days=days - 1)
+    rows = (
+        DailyRollup.objects.filter(date__gte=start).order_by('transaction_type')
+        .values('transaction_type').annotate(count=Sum('count'), total=Sum('total'))
+    )
+    labels = dict(Transaction.TRANSACTION_TYPES)
+    return [{
+        'transaction_type': row['transaction_type'],
+        'label': labels.get(row['transaction_type'], row['transaction_type']),
+        'count': row['count'],
+        'total': _as_float(row['total']),
+    } for row in rows]
+
+
+def balance_distribution():
+    """Number of active accounts per balance bucket, in one aggregate query"""
+    counts = {}
+    for label, low, high in BALANCE_BUCKETS:
+        condition = Q(balance__gte=low)
+        if high is not None:
+            condition &= Q(balance__lt=high)
+        counts[label] = Count('pk', filter=condition)
+    totals = Account.objects.filter(is_active=True).aggregate(**counts)
+    return [{'bucket': label, 'accounts': totals[label]} for label, _, _ in BALANCE_BUCKETS]
+
+
+def top_accounts():
+    rows = (
+        Account.objects.filter(is_active=True).order_by('-balance')
+        .values('account_number', 'account_holder', 'balance')[:TOP_ACCOUNTS]
+    )
+    return [dict(row, balance=_as_float(row['balance'])) for row in rows]
+
+
+def recent_transactions():
+    rows = (
+        Transaction.objects.order_by('-timestamp', '-id')
+        .values('id', 'account_id', 'transaction_type', 'amount', 'balance_after', 'description',
+                'timestamp')[:RECENT_TRANSACTIONS]
+    )
+    labels = dict(Transaction.TRANSACTION_TYPES)
+    return [{
+        'id': row['id'],
+        'account_number': row['account_id'],
+        'transaction_type': row['transaction_type'],
+        'transaction_type_display': labels.get(row['transaction_type'], row['transaction_type']),
+        'amount': str(row['amount']),
+        'balance_after': str(row['balance_after']),
+        'description': row['description'],
+        'timestamp': row['timestamp'].isoformat(),
+    } for row in rows]
+
+
+def build(days):
+    summary = BankSummary.totals()
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'days': days,
+        'summary': dict(summary, total_deposits=_as_float(summary['total_deposits'])),
+        'activity': activity(days),
+        'monthly': monthly(),
+        'type_breakdown': type_breakdown(days),
+        'balance_distribution': balance_distribution(),
+        'top_accounts': top_accounts(),
+        'recent_transactions': recent_transactions(),
+    }
+
+
+def current(days):
+    """Dashboard payload, cached for BANK_DASHBOARD_CACHE_TTL seconds per window size"""
+    return cache.get_or_set(f'bank-dashboard:{days}', lambda: build(days), settings.BANK_DASHBOARD_CACHE_TTL)
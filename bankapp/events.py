@@ -0,0 +1,182 @@
+import asyncio
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """Queue of events for one subscriber, bound to the event loop it was created on"""
+    
+    def __init__(self, loop, topics, queue_size):
+        self.loop = loop
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize=queue_size)
+    
+    def wants(self, topic):
+        return not self.topics or topic in self.topics
+    
+    def offer(self, event):
+        # A consumer that falls behind loses its oldest events, never blocks publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+    
+    async def get(self, timeout=None):
+        """Next event; raises ``asyncio.TimeoutError`` after ``timeout`` seconds"""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        return await self.queue.get()
+
+
+class LocalBroker:
+    """In-process publish/subscribe broker for posting events.
+    
+    Publishers may run on any thread; each subscriber receives events on the
+    event loop it subscribed from. Delivery is limited to one process, so run
+    a single ASGI worker (or swap in a shared broker through BANK_EVENT_BROKER)
+    when serving the feed.
+    """
+    
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+    
+    def has_subscribers(self):
+        return bool(self._subscriptions)
+    
+    def publish(self, topic, event):
+        with self._lock:
+            subscriptions = [sub for sub in self._subscriptions if sub.wants(topic)]
+        for sub in subscriptions:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+            except RuntimeError:
+                # The subscriber's event loop has shut down
+                self.unsubscribe(sub)
+    
+    def subscribe(self, topics=None):
+        """Register a subscription for ``topics`` (account numbers; everything if empty).
+        
+        Must be called from a running event loop; pair with ``unsubscribe``.
+        """
+        sub = Subscription(asyncio.get_running_loop(), set(topics or ()), self.queue_size)
+        with self._lock:
+            self._subscriptions.add(sub)
+        return sub
+    
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscriptions.discard(sub)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """The process-wide broker configured by BANK_EVENT_BROKER"""
+    return import_string(settings.BANK_EVENT_BROKER)()
+
+
+def posting_event(posted):
+    return {
+        'type': 'posting',
+        'account_number': posted.account_id,
+        'balance': str(posted.balance_after),
+        'transaction': {
+            'id': posted.id,
+            'transaction_type': posted.transaction_type,
+            'transaction_type_display': posted.get_transaction_type_display(),
+            'amount': f'{posted.amount:.2f}',
+            'balance_after': str(posted.balance_after),
+            'description': posted.description,
+            'timestamp': posted.timestamp.isoformat(),
+        },
+    }
+
+
+def publish_postings(transactions):
+    """Publish saved ledger rows to subscribers once the posting commits"""
+    broker = get_broker()
+    if not broker.has_subscribers():
+        return
+    
+    def publish():
+        for posted in transactions:
+            broker.publish(posted.account_id, posting_event(posted))
+    
+    db_transaction.on_commit(publish)
+
+
+def sse_message(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def sse_stream(topics, heartbeat, lifetime):
+    """Server-Sent Events body: one message per event, with periodic keep-alive comments.
+    
+    The stream ends after ``lifetime`` seconds and the client's EventSource
+    reconnects, so a subscription outlives its client by at most that long
+    even where the disconnect goes unnoticed.
+    """
+    broker = get_broker()
+    sub = broker.subscribe(topics)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + lifetime
+    try:
+        yield ': connected\n\n'
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await sub.get(min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield sse_message(event)
+    finally:
+        broker.unsubscribe(sub)
+
+
+class CancelOnDisconnect:
+    """ASGI middleware that cancels the app when the client of a streaming path disconnects.
+    
+    Django before 5.0 stops reading ``receive`` once the request body is in,
+    so an endless response never learns that its client went away. For
+    requests under ``paths`` this reads ``receive`` on the app's behalf and
+    cancels it on ``http.disconnect``, which closes the response's generator.
+    """
+    
+    def __init__(self, app, paths):
+        self.app = app
+        self.paths = tuple(paths)
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.paths):
+            return await self.app(scope, receive, send)
+        
+        messages = asyncio.Queue()
+        
+        async def listen():
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message['type'] == 'http.disconnect':
+                    return
+        
+        listener = asyncio.ensure_future(listen())
+        app = asyncio.ensure_future(self.app(scope, messages.get, send))
+        try:
+            await asyncio.wait({listener, app}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            listener.cancel()
+            app.cancel()
+        try:
+            await app
+        except asyncio.CancelledError:
+            # The client disconnected mid-response
+            pass
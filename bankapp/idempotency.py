@@ -0,0 +1,152 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction as db_transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+class ResponseCache:
+    """Small thread-safe LRU of completed responses with a TTL"""
+    
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+recent_responses = ResponseCache(settings.BANK_IDEMPOTENCY_CACHE_SIZE, settings.BANK_IDEMPOTENCY_TTL)
+
+
+def fingerprint(request):
+    """Hash of what the request asks for, used to reject a key reused for a different request"""
+    payload = json.dumps([request.method, request.path, request.data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def idempotent(view):
+    """Replay the stored response when a request repeats its Idempotency-Key header.
+    
+    A repeated key is answered from the in-process cache or the key table
+    before the view runs, so balances and account locks are never touched.
+    A new key is claimed in the same transaction as the view's writes; it is
+    stored together with the response, or rolled back with them.
+    Server errors are not stored, so they can be retried.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        request = next(arg for arg in args if isinstance(arg, Request))
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return Response({'error': f'{HEADER} must be at most 255 characters'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        request_hash = fingerprint(request)
+        stored = _lookup(key)
+        if stored is not None:
+            return _replay(stored, request_hash)
+        
+        try:
+            with db_transaction.atomic():
+                with db_transaction.atomic():
+                    record = IdempotencyKey.objects.create(key=key, fingerprint=request_hash)
+                response = view(*args, **kwargs)
+                if response.status_code >= 500:
+                    raise _NotStored(response)
+                record.status_code = response.status_code
+                record.response = json.loads(JSONRenderer().render(response.data) or 'null')
+                record.save(update_fields=['status_code', 'response'])
+        except _NotStored as e:
+            return e.response
+        except IntegrityError:
+            # Another request with the same key committed first
+            stored = _lookup(key)
+            if stored is None:
+                return Response({'error': 'A request with this Idempotency-Key is already in progress'},
+                                status=status.HTTP_409_CONFLICT)
+            return _replay(stored, request_hash)
+        
+        recent_responses.set(key, (record.fingerprint, record.status_code, record.response))
+        return response
+    
+    return wrapper
+
+
+class _NotStored(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def _lookup(key):
+    stored = recent_responses.get(key)
+    if stored is not None:
+        return stored
+    
+    record = IdempotencyKey.objects.filter(key=key).first()
+    if record is None:
+        return None
+    if record.created_at < timezone.now() - timedelta(seconds=settings.BANK_IDEMPOTENCY_TTL):
+        IdempotencyKey.objects.filter(key=key, created_at=record.created_at).delete()
+        return None
+    stored = (record.fingerprint, record.status_code, record.response)
+    recent_responses.set(key, stored)
+    return stored
+
+
+def purge_expired(chunk_size=1000):
+    """Delete keys older than BANK_IDEMPOTENCY_TTL, ``chunk_size`` rows per DELETE; returns the count"""
+    expired = IdempotencyKey.objects.filter(
+        created_at__lt=timezone.now() - timedelta(seconds=settings.BANK_IDEMPOTENCY_TTL))
+    deleted = 0
+    while True:
+        keys = list(expired.values_list('pk', flat=True)[:chunk_size])
+        if not keys:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(pk__in=keys).delete()[0]
+
+
+def _replay(stored, request_hash):
+    stored_hash, status_code, body = stored
+    if stored_hash != request_hash:
+        return Response({'error': f'{HEADER} was already used for a different request'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return Response(body, status=status_code, headers={REPLAYED_HEADER: 'true'})
@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+
+from .models import Account, Transaction, BankSummary, record_postings
+from .numbering import account_numbers
+
+FORMATS = ('csv', 'ndjson')
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(filename, default='csv'):
+    """Guess the import format from a file name"""
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def read_rows(stream, fmt):
+    """Yield ``(line_number, row)`` pairs from a text stream, one row at a time"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'ndjson':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def text_stream(binary):
+    """Wrap an uploaded binary file so it can be read as UTF-8 text lines"""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def clean_row(row):
+    """Validate one input row, returning ``(account_holder, initial_balance)``"""
+    if row is None:
+        raise ValueError("Malformed row")
+    
+    account_holder = str(row.get('account_holder') or '').strip()
+    if not account_holder:
+        raise ValueError("account_holder is required")
+    if len(account_holder) > 200:
+        raise ValueError("account_holder must be at most 200 characters")
+    
+    try:
+        initial_balance = Decimal(str(row.get('initial_balance') or '0')).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError("initial_balance must be a number")
+    if not initial_balance.is_finite():
+        raise ValueError("initial_balance must be a number")
+    if initial_balance < 0:
+        raise ValueError("initial_balance cannot be negative")
+    if initial_balance >= Decimal('1e13'):
+        raise ValueError("initial_balance is too large")
+    
+    return account_holder, initial_balance
+
+
+def import_accounts(rows, chunk_size=1000, progress=None):
+    """Create accounts from ``(line_number, row)`` pairs in fixed-size chunks.
+    
+    Only one chunk is held in memory at a time. Each chunk takes a contiguous
+    block of account numbers and is written with two ``bulk_create`` calls
+    (accounts, then their INITIAL transactions) in its own transaction.
+    ``progress`` is called with the running totals after every chunk.
+    """
+    stats = {'imported': 0, 'rejected': 0, 'errors': []}
+    chunk = []
+    
+    for line_number, row in rows:
+        try:
+            chunk.append(clean_row(row))
+        except ValueError as e:
+            stats['rejected'] += 1
+            if len(stats['errors']) < MAX_REPORTED_ERRORS:
+                stats['errors'].append({'line': line_number, 'error': str(e)})
+            continue
+        
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, stats, progress)
+            chunk = []
+    
+    if chunk:
+        _import_chunk(chunk, stats, progress)
+    return stats
+
+
+def _import_chunk(chunk, stats, progress):
+    numbers = account_numbers.allocate_many(len(chunk))
+    accounts = []
+    ledger = []
+    total_balance = Decimal('0.00')
+    
+    for number, (account_holder, initial_balance) in zip(numbers, chunk):
+        account = Account(
+            account_number=number,
+            account_holder=account_holder,
+            balance=initial_balance,
+            transaction_count=1 if initial_balance > 0 else 0
+        )
+        accounts.append(account)
+        if initial_balance > 0:
+            total_balance += initial_balance
+            ledger.append(Transaction(
+                account=account,
+                transaction_type='INITIAL',
+                amount=initial_balance,
+                balance_after=initial_balance,
+                description='Account opened'
+            ))
+    
+    with db_transaction.atomic():
+        Account.objects.bulk_create(accounts)
+        Transaction.objects.bulk_create(ledger)
+        record_postings(ledger)
+        BankSummary.bump(total_accounts=len(accounts), active_accounts=len(accounts),
+                         total_deposits=total_balance, total_transactions=len(ledger))
+    
+    stats['imported'] += len(accounts)
+    if progress:
+        progress(stats)
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bankapp.archive import archive_transactions
+from bankapp.statements import parse_bound
+
+
+class Command(BaseCommand):
+    help = 'Move transactions older than the retention window from the ledger table into archive segments'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.BANK_ARCHIVE_RETENTION_DAYS,
+                            help='Keep this many days of transactions in the ledger table')
+        parser.add_argument('--before', help='Archive transactions before this date or datetime instead')
+        parser.add_argument('--dir', default=settings.BANK_ARCHIVE_DIR, help='Archive directory')
+    
+    def handle(self, *args, **options):
+        try:
+            before = parse_bound(options['before']) or timezone.now() - timedelta(days=options['days'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        try:
+            stats = archive_transactions(before, options['dir'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {stats['archived']} transactions of {stats['accounts']} accounts archived "
+            f"to {stats['segment'] or 'no new segment'}, {stats['deleted']} removed from the ledger table "
+            f"(cutoff {stats['cutoff'].isoformat()})"
+        ))
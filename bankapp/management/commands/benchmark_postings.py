@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import random
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+
+def run_worker(job):
+    """Post ``job['postings']`` deposits/transfers from one process; returns its counters"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', job['settings'])
+    django.setup()
+    # Imported here: under the spawn start method this module loads before setup()
+    from bankapp.models import Account
+    
+    rng = random.Random(job['seed'])
+    accounts = job['accounts']
+    stats = {'posted': 0, 'locked': 0, 'rejected': 0, 'slowest': 0.0}
+    for _ in range(job['postings']):
+        started = time.perf_counter()
+        try:
+            if rng.random() < job['transfer_ratio']:
+                from_number, to_number = rng.sample(accounts, 2)
+                Account.transfer(from_number, to_number, 1)
+            else:
+                Account.objects.get(pk=rng.choice(accounts)).deposit(1, 'Benchmark')
+            stats['posted'] += 1
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            stats['locked'] += 1
+        except ValueError:
+            stats['rejected'] += 1
+        stats['slowest'] = max(stats['slowest'], time.perf_counter() - started)
+    connections.close_all()
+    return stats
+
+
+class Command(BaseCommand):
+    help = ('Run parallel posting processes against the configured database and report throughput '
+            'and "database is locked" errors. Creates benchmark accounts, so point it at a scratch database.')
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Number of posting processes')
+        parser.add_argument('--postings', type=int, default=500, help='Postings per process')
+        parser.add_argument('--accounts', type=int, default=10, help='Benchmark accounts the postings are spread over')
+        parser.add_argument('--transfer-ratio', type=float, default=0.2, help='Share of postings that are transfers')
+    
+    def handle(self, *args, **options):
+        from bankapp.models import Account
+        
+        if options['workers'] < 1 or options['postings'] < 1 or options['accounts'] < 2:
+            raise CommandError('Need at least 1 worker, 1 posting and 2 accounts')
+        
+        journal = 'n/a'
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal = cursor.fetchone()[0]
+        self.stdout.write(f"Backend: {connection.settings_dict['ENGINE']} (journal mode: {journal})")
+        
+        accounts = [Account.open(f'Benchmark {i + 1}', 1000).pk for i in range(options['accounts'])]
+        # Workers open their own connections; never share this one across fork()
+        connections.close_all()
+        
+        jobs = [{
+            'settings': os.environ['DJANGO_SETTINGS_MODULE'],
+            'accounts': accounts,
+            'postings': options['postings'],
+            'transfer_ratio': options['transfer_ratio'],
+            'seed': worker,
+        } for worker in range(options['workers'])]
+        
+        started = time.perf_counter()
+        with multiprocessing.Pool(options['workers']) as pool:
+            results = pool.map(run_worker, jobs)
+        elapsed = time.perf_counter() - started
+        
+        posted = sum(stats['posted'] for stats in results)
+        locked = sum(stats['locked'] for stats in results)
+        rejected = sum(stats['rejected'] for stats in results)
+        slowest = max(stats['slowest'] for stats in results)
+        self.stdout.write(
+            f"{options['workers']} workers x {options['postings']} postings in {elapsed:.2f}s: "
+            f"{posted / elapsed:.0f} postings/s, {locked} lock errors, {rejected} rejected, "
+            f"slowest posting {slowest * 1000:.0f} ms"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Done: accounts {accounts[0]}-{accounts[-1]} hold the benchmark postings"))
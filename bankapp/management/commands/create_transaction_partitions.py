@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction as db_transaction
+
+from bankapp import partitioning
+
+
+class Command(BaseCommand):
+    help = 'Create the upcoming monthly ledger partitions on PostgreSQL; run it at least once a month'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=settings.BANK_TRANSACTION_PARTITIONS_AHEAD,
+                            help='Months after the current one to create partitions for')
+    
+    def handle(self, *args, **options):
+        if not partitioning.is_partitioned(connection):
+            raise CommandError('The transaction table is not partitioned (PostgreSQL only, see migration 0009)')
+        
+        with db_transaction.atomic():
+            created = partitioning.ensure_partitions(connection, options['months'])
+        for name in created:
+            self.stdout.write(f'Created {name}')
+        self.stdout.write(self.style.SUCCESS(f'Done: {len(created)} partitions created'))
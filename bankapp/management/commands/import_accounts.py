@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bankapp.importing import FORMATS, detect_format, read_rows, import_accounts
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create accounts from a CSV or NDJSON file with account_holder and initial_balance columns'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--format', choices=FORMATS, help='Input format (default: from the file extension)')
+        parser.add_argument('--chunk-size', type=int, default=settings.BANK_IMPORT_CHUNK_SIZE, help='Accounts written per transaction')
+    
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        
+        def report(stats):
+            self.stdout.write(f"Imported {stats['imported']} accounts ({stats['rejected']} rejected)...")
+        
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as stream:
+                stats = import_accounts(read_rows(stream, fmt), options['chunk_size'], progress=report)
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+        
+        for error in stats['errors']:
+            self.stderr.write(f"Line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {stats['imported']} accounts imported, {stats['rejected']} rejected"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from bankapp.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete Idempotency-Key records older than BANK_IDEMPOTENCY_TTL (run it periodically, e.g. from cron)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows deleted per statement')
+    
+    def handle(self, *args, **options):
+        deleted = purge_expired(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from bankapp.models import BankSummary
+
+
+class Command(BaseCommand):
+    help = 'Recompute the bank summary totals from the accounts and transactions tables'
+    
+    def handle(self, *args, **options):
+        summary = BankSummary.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Bank summary rebuilt: {summary.total_accounts} accounts '
+            f'({summary.active_accounts} active), ${summary.total_deposits} in deposits, '
+            f'{summary.total_transactions} transactions'
+        ))
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction as db_transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from bankapp import archive
+from bankapp.models import DailyRollup, Transaction
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-account daily rollups from the ledger'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only rebuild days from this date (YYYY-MM-DD) onwards')
+    
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid date: {options['since']}")
+        
+        # Days with archived postings can no longer be recounted from the ledger table
+        cutoff = archive.current().cutoff
+        if cutoff:
+            # The day after the one holding the last archived instant
+            first_hot_day = timezone.localdate(cutoff - timedelta(microseconds=1)) + timedelta(days=1)
+            if since is None or since < first_hot_day:
+                self.stdout.write(f'Keeping the rollups before {first_hot_day}: those days are archived')
+                since = first_hot_day
+        
+        ledger = Transaction.objects.annotate(date=TruncDate('timestamp'))
+        rollups = DailyRollup.objects.all()
+        if since:
+            ledger = ledger.filter(date__gte=since)
+            rollups = rollups.filter(date__gte=since)
+        groups = (
+            ledger.order_by()
+            .values('account_id', 'date', 'transaction_type')
+            .annotate(count=Count('id'), total=Sum('amount'))
+        )
+        
+        created = 0
+        with db_transaction.atomic():
+            rollups.delete()
+            batch = []
+            for group in groups.iterator():
+                batch.append(DailyRollup(**group))
+                if len(batch) >= 1000:
+                    DailyRollup.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            DailyRollup.objects.bulk_create(batch)
+            created += len(batch)
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} daily rollups'))
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:24
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_transaction_count(apps, schema_editor):
+    Account = apps.get_model('bankapp', 'Account')
+    Transaction = apps.get_model('bankapp', 'Transaction')
+    counts = (
+        Transaction.objects.filter(account=OuterRef('pk'))
+        .order_by()
+        .values('account')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Account.objects.update(
+        transaction_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bankapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='transaction_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_transaction_count, migrations.RunPython.noop),
+    ]
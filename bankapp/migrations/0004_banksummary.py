@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:27
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def seed_bank_summary(apps, schema_editor):
+    Account = apps.get_model('bankapp', 'Account')
+    Transaction = apps.get_model('bankapp', 'Transaction')
+    BankSummary = apps.get_model('bankapp', 'BankSummary')
+    accounts = Account.objects.aggregate(
+        total_accounts=Count('pk'),
+        active_accounts=Count('pk', filter=Q(is_active=True)),
+        total_deposits=Sum('balance'),
+    )
+    BankSummary.objects.create(
+        shard=0,
+        total_accounts=accounts['total_accounts'],
+        active_accounts=accounts['active_accounts'],
+        total_deposits=accounts['total_deposits'] or Decimal('0.00'),
+        total_transactions=Transaction.objects.count(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bankapp', '0003_transaction_timestamp_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(unique=True)),
+                ('total_accounts', models.BigIntegerField(default=0)),
+                ('active_accounts', models.BigIntegerField(default=0)),
+                ('total_deposits', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20)),
+                ('total_transactions', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Bank Summary',
+                'verbose_name_plural': 'Bank Summary',
+            },
+        ),
+        migrations.RunPython(seed_bank_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:28
+
+from django.db import migrations, models
+
+
+def seed_account_number_sequence(apps, schema_editor):
+    Account = apps.get_model('bankapp', 'Account')
+    AccountNumberSequence = apps.get_model('bankapp', 'AccountNumberSequence')
+    highest = 1000
+    for number in Account.objects.values_list('account_number', flat=True).iterator():
+        if number.isdigit():
+            highest = max(highest, int(number))
+    AccountNumberSequence.objects.create(name='account', next_value=highest + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bankapp', '0004_banksummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountNumberSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('next_value', models.BigIntegerField()),
+            ],
+        ),
+        migrations.RunPython(seed_account_number_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bankapp', '0006_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('transaction_count', models.PositiveIntegerField()),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='bankapp.account')),
+            ],
+            options={
+                'verbose_name': 'Balance Checkpoint',
+                'verbose_name_plural': 'Balance Checkpoints',
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['account', '-timestamp'], name='checkpoint_account_ts_idx')],
+            },
+        ),
+    ]
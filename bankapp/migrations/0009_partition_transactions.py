@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db import migrations
+
+from bankapp import partitioning
+
+
+def partition_transactions(apps, schema_editor):
+    # Partitioning is PostgreSQL-only; other backends keep the plain table
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    partitioning.partition_table(schema_editor.connection, settings.BANK_TRANSACTION_PARTITIONS_AHEAD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bankapp', '0008_dailyrollup'),
+    ]
+
+    operations = [
+        # The model state is unchanged: Django still sees ``id`` as the primary key
+        migrations.RunPython(partition_transactions, migrations.RunPython.noop, elidable=False),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bankapp', '0009_partition_transactions'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='BalanceCheckpoint',
+        ),
+    ]
@@ -1,7 +1,16 @@
-from django.db import models
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction as db_transaction
+from django.db.models import F, Sum
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
+from . import account_cache, archive, events
+from .numbering import account_numbers
+
 
 class Account(models.Model):
     """Bank Account Model"""
@@ -10,6 +19,7 @@ class Account(models.Model):
     balance = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'), 
                                    validators=[MinValueValidator(Decimal('0.00'))])
     is_active = models.BooleanField(default=True)
+    transaction_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -22,57 +32,286 @@ class Account(models.Model):
         status = "Active" if self.is_active else "Closed"
         return f"Account #{self.account_number} | {self.account_holder} | ${self.balance} | {status}"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        account_cache.invalidate([self.pk])
+    
+    def delete(self, *args, **kwargs):
+        account_cache.invalidate([self.pk])
+        return super().delete(*args, **kwargs)
+    
+    @classmethod
+    def open(cls, account_holder, initial_balance=0):
+        """Create an account, its INITIAL transaction and update the bank totals"""
+        initial_balance = Decimal(str(initial_balance or 0))
+        account_number = account_numbers.allocate()
+        
+        with db_transaction.atomic():
+            account = cls.objects.create(
+                account_number=account_number,
+                account_holder=account_holder,
+                balance=initial_balance,
+                transaction_count=1 if initial_balance > 0 else 0
+            )
+            
+            # Create initial transaction if balance > 0
+            if initial_balance > 0:
+                initial = Transaction.objects.create(
+                    account=account,
+                    transaction_type='INITIAL',
+                    amount=initial_balance,
+                    balance_after=initial_balance,
+                    description='Account opened'
+                )
+                record_postings([initial])
+            
+            BankSummary.bump(total_accounts=1, active_accounts=1, total_deposits=initial_balance,
+                             total_transactions=account.transaction_count)
+        
+        return account
+    
     def deposit(self, amount, description=""):
         """Deposit money into the account"""
+        amount = Decimal(str(amount))
         if amount <= 0:
             raise ValueError("Deposit amount must be positive")
         
-        if not self.is_active:
-            raise ValueError("Account is closed")
-        
-        self.balance += Decimal(str(amount))
-        self.save()
-        
-        Transaction.objects.create(
-            account=self,
-            transaction_type='DEPOSIT',
-            amount=Decimal(str(amount)),
-            balance_after=self.balance,
-            description=description
-        )
-        return self.balance
+        return self._post('DEPOSIT', amount, description)
     
     def withdraw(self, amount, description=""):
         """Withdraw money from the account"""
+        amount = Decimal(str(amount))
         if amount <= 0:
             raise ValueError("Withdrawal amount must be positive")
         
+        return self._post('WITHDRAWAL', -amount, description)
+    
+    def _post(self, transaction_type, delta, description=""):
+        """Apply a signed balance change and record it in the ledger.
+        
+        The balance is changed with a single conditional UPDATE so concurrent
+        postings against the same account can never overdraw it or lose an
+        update; the ledger row is written in the same database transaction
+        and kept on ``self.last_transaction``.
+        """
+        rows = Account.objects.filter(pk=self.pk, is_active=True)
+        if delta < 0:
+            rows = rows.filter(balance__gte=-delta)
+        
+        now = timezone.now()
+        with db_transaction.atomic():
+            if not rows.update(balance=F('balance') + delta, transaction_count=F('transaction_count') + 1,
+                               updated_at=now):
+                self._raise_posting_error()
+            self.balance, self.transaction_count = (
+                Account.objects.filter(pk=self.pk).values_list('balance', 'transaction_count').get()
+            )
+            self.updated_at = now
+            self.last_transaction = Transaction.objects.create(
+                account=self,
+                transaction_type=transaction_type,
+                amount=abs(delta),
+                balance_after=self.balance,
+                description=description
+            )
+            record_postings([self.last_transaction])
+            BankSummary.bump(total_deposits=delta, total_transactions=1)
+        return self.balance
+    
+    def _raise_posting_error(self):
+        """Explain why a conditional balance update matched no row"""
+        current = Account.objects.filter(pk=self.pk).values('balance', 'is_active').first()
+        if current is None:
+            raise ValueError(f"Account {self.pk} does not exist")
+        self.balance = current['balance']
+        self.is_active = current['is_active']
         if not self.is_active:
             raise ValueError("Account is closed")
+        raise ValueError(f"Insufficient funds. Current balance: ${self.balance}")
+    
+    @classmethod
+    def transfer(cls, from_number, to_number, amount):
+        """Move money between two accounts atomically.
+        
+        Both rows are locked in primary key order, so concurrent transfers in
+        opposite directions cannot deadlock. The balances change through
+        conditional UPDATEs and both ledger legs (TRANSFER_OUT/TRANSFER_IN)
+        are written with one ``bulk_create``.
+        Returns the ``(from_account, to_account)`` pair with updated balances.
+        """
+        amount = Decimal(str(amount))
+        if amount <= 0:
+            raise ValueError("Transfer amount must be positive")
+        if from_number == to_number:
+            raise ValueError("Source and destination accounts cannot be the same.")
         
-        if Decimal(str(amount)) > self.balance:
-            raise ValueError(f"Insufficient funds. Current balance: ${self.balance}")
+        now = timezone.now()
+        with db_transaction.atomic():
+            accounts = cls.lock_in_order([from_number, to_number])
+            for number in (from_number, to_number):
+                if number not in accounts:
+                    raise cls.DoesNotExist(f"Account {number} does not exist")
+                if not accounts[number].is_active:
+                    raise ValueError(f"Account {number} is closed")
+            from_account, to_account = accounts[from_number], accounts[to_number]
+            if from_account.balance < amount:
+                raise ValueError(f"Insufficient funds. Current balance: ${from_account.balance}")
+            
+            legs = []
+            for account, delta, transaction_type, description in (
+                    (from_account, -amount, 'TRANSFER_OUT', f'Transfer to account {to_number}'),
+                    (to_account, amount, 'TRANSFER_IN', f'Transfer from account {from_number}')):
+                rows = cls.objects.filter(pk=account.pk, is_active=True)
+                if delta < 0:
+                    rows = rows.filter(balance__gte=-delta)
+                if not rows.update(balance=F('balance') + delta, transaction_count=F('transaction_count') + 1,
+                                   updated_at=now):
+                    account._raise_posting_error()
+                account.balance += delta
+                account.transaction_count += 1
+                account.updated_at = now
+                account.last_transaction = Transaction(
+                    account=account,
+                    transaction_type=transaction_type,
+                    amount=amount,
+                    balance_after=account.balance,
+                    description=description
+                )
+                legs.append(account.last_transaction)
+            
+            Transaction.objects.bulk_create(legs)
+            record_postings(legs)
+            BankSummary.bump(total_transactions=len(legs))
         
-        self.balance -= Decimal(str(amount))
-        self.save()
+        return from_account, to_account
+    
+    @classmethod
+    def lock_in_order(cls, numbers, batch_size=500):
+        """Lock the given accounts with SELECT ... FOR UPDATE, in primary key order.
         
-        Transaction.objects.create(
-            account=self,
-            transaction_type='WITHDRAWAL',
-            amount=Decimal(str(amount)),
-            balance_after=self.balance,
-            description=description
-        )
-        return self.balance
+        Taking row locks in one global order keeps concurrent writers from
+        deadlocking. Large sets are locked in consecutive batches (each
+        ordered), which keeps that order. Returns ``{account_number: account}``.
+        Must run inside a transaction.
+        """
+        numbers = sorted(numbers)
+        accounts = {}
+        for start in range(0, len(numbers), batch_size):
+            rows = cls.objects.select_for_update().filter(pk__in=numbers[start:start + batch_size]).order_by('pk')
+            accounts.update((account.pk, account) for account in rows)
+        return accounts
+    
+    @classmethod
+    def post_batch(cls, postings):
+        """Apply many deposits/withdrawals at once.
+        
+        ``postings`` is a sequence of dicts with ``account``, ``transaction_type``
+        (``DEPOSIT`` or ``WITHDRAWAL``), ``amount`` and optional ``description``.
+        Postings are applied in order per account; each one either succeeds or is
+        rejected on its own. Every touched account gets a single balance UPDATE
+        and all ledger rows are written with one ``bulk_create``.
+        Returns one result dict per posting, in input order.
+        """
+        results = [None] * len(postings)
+        ledger = []
+        net = {}
+        counts = {}
+        now = timezone.now()
+        
+        with db_transaction.atomic():
+            accounts = cls.lock_in_order({p['account'] for p in postings})
+            balances = {number: account.balance for number, account in accounts.items()}
+            
+            for index, posting in enumerate(postings):
+                number = posting['account']
+                amount = Decimal(str(posting['amount']))
+                account = accounts.get(number)
+                error = None
+                if account is None:
+                    error = f"Account {number} does not exist"
+                elif not account.is_active:
+                    error = "Account is closed"
+                elif posting['transaction_type'] == 'WITHDRAWAL' and amount > balances[number]:
+                    error = f"Insufficient funds. Current balance: ${balances[number]}"
+                
+                if error:
+                    results[index] = {'index': index, 'account': number, 'status': 'error', 'error': error}
+                    continue
+                
+                delta = amount if posting['transaction_type'] == 'DEPOSIT' else -amount
+                balances[number] += delta
+                net[number] = net.get(number, Decimal('0.00')) + delta
+                counts[number] = counts.get(number, 0) + 1
+                ledger.append(Transaction(
+                    account=account,
+                    transaction_type=posting['transaction_type'],
+                    amount=amount,
+                    balance_after=balances[number],
+                    description=posting.get('description', '')
+                ))
+                results[index] = {'index': index, 'account': number, 'status': 'ok',
+                                  'balance_after': balances[number]}
+            
+            for number, delta in net.items():
+                cls.objects.filter(pk=number).update(balance=F('balance') + delta,
+                                                     transaction_count=F('transaction_count') + counts[number],
+                                                     updated_at=now)
+            Transaction.objects.bulk_create(ledger, batch_size=1000)
+            record_postings(ledger)
+            BankSummary.bump(total_deposits=sum(net.values(), Decimal('0.00')), total_transactions=len(ledger))
+        
+        return results
     
     def close_account(self):
         """Close the account"""
         self.is_active = False
-        self.save()
+        self.updated_at = timezone.now()
+        with db_transaction.atomic():
+            # Only touch the status columns so a stale in-memory balance is never written back
+            if Account.objects.filter(pk=self.pk, is_active=True).update(is_active=False, updated_at=self.updated_at):
+                BankSummary.bump(active_accounts=-1)
+                account_cache.invalidate([self.pk])
+    
+    def balance_at(self, before):
+        """Balance just before the moment ``before``.
+        
+        Every ledger row carries ``balance_after``, so this is the latest row
+        before that moment: one seek on txn_account_timestamp_idx. Falls back
+        to the archive when that row has been moved there.
+        """
+        latest = (self.transactions.filter(timestamp__lt=before).order_by('-timestamp', '-id')
+                  .values_list('timestamp', 'balance_after').first())
+        cutoff = archive.current().cutoff
+        if cutoff and (latest is None or latest[0] < cutoff):
+            archived = archive.current().balance_before(self.pk, before)
+            if archived and (latest is None or archived[0] > latest[0]):
+                latest = archived
+        return latest[1] if latest else Decimal('0.00')
     
     def get_transaction_count(self):
         """Get total number of transactions"""
-        return self.transactions.count()
+        return self.transaction_count
+
+
+class AccountNumberSequence(models.Model):
+    """Next account number not yet reserved by any worker"""
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField()
+    
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
+class IdempotencyKey(models.Model):
+    """Response stored for a request sent with an Idempotency-Key header"""
+    key = models.CharField(max_length=255, primary_key=True)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return f"{self.key} -> {self.status_code}"
 
 
 class Transaction(models.Model):
@@ -93,10 +332,147 @@ class Transaction(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        ordering = ['-timestamp']
+        ordering = ['-timestamp', '-id']
+        indexes = [
+            models.Index(fields=['account', '-timestamp', '-id'], name='txn_account_timestamp_idx'),
+            models.Index(fields=['-timestamp', '-id'], name='txn_timestamp_idx'),
+        ]
         verbose_name = 'Transaction'
         verbose_name_plural = 'Transactions'
     
     def __str__(self):
         return f"[{self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}] {self.get_transaction_type_display()}: ${self.amount} | Balance: ${self.balance_after}"
 
+
+class DailyRollup(models.Model):
+    """Per-account, per-day count and sum of postings of one transaction type"""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='daily_rollups')
+    date = models.DateField()
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TRANSACTION_TYPES)
+    count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal('0.00'))
+    
+    class Meta:
+        ordering = ['-date', 'transaction_type']
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'date', 'transaction_type'], name='unique_daily_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'transaction_type'], name='rollup_date_type_idx'),
+        ]
+        verbose_name = 'Daily Rollup'
+        verbose_name_plural = 'Daily Rollups'
+    
+    def __str__(self):
+        return f"Account #{self.account_id} | {self.date} | {self.transaction_type}: {self.count} / ${self.total}"
+    
+    @classmethod
+    def record(cls, transactions):
+        """Add saved ``transactions`` to their day's rollups.
+        
+        Must run in the posting's transaction: the posting holds the account
+        row lock, so rollups of one account are never created concurrently.
+        """
+        groups = {}
+        for posted in transactions:
+            key = (posted.account_id, timezone.localdate(posted.timestamp), posted.transaction_type)
+            count, total = groups.get(key, (0, Decimal('0.00')))
+            groups[key] = (count + 1, total + posted.amount)
+        
+        missing = []
+        for (account_id, date, transaction_type), (count, total) in groups.items():
+            if not cls.objects.filter(account_id=account_id, date=date, transaction_type=transaction_type).update(
+                    count=F('count') + count, total=F('total') + total):
+                missing.append(cls(account_id=account_id, date=date, transaction_type=transaction_type,
+                                   count=count, total=total))
+        if missing:
+            cls.objects.bulk_create(missing)
+
+
+class BankSummary(models.Model):
+    """Running bank-wide totals, kept in a few shard rows.
+    
+    Every account creation, posting and closure adds its deltas to one
+    randomly chosen shard in the same database transaction, so the summary is
+    read by summing a handful of rows instead of scanning both tables, and
+    concurrent postings rarely contend on the same counter row.
+    """
+    shard = models.PositiveSmallIntegerField(unique=True)
+    total_accounts = models.BigIntegerField(default=0)
+    active_accounts = models.BigIntegerField(default=0)
+    total_deposits = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal('0.00'))
+    total_transactions = models.BigIntegerField(default=0)
+    
+    CACHE_KEY = 'bank-summary'
+    
+    class Meta:
+        verbose_name = 'Bank Summary'
+        verbose_name_plural = 'Bank Summary'
+    
+    def __str__(self):
+        return f"Summary shard {self.shard} | Accounts: {self.total_accounts} | ${self.total_deposits}"
+    
+    @classmethod
+    def bump(cls, **deltas):
+        """Add the given deltas to one shard; call inside the posting's transaction"""
+        deltas = {field: value for field, value in deltas.items() if value}
+        if not deltas:
+            return
+        
+        shard = random.randrange(settings.BANK_SUMMARY_SHARDS)
+        changes = {field: F(field) + value for field, value in deltas.items()}
+        if not cls.objects.filter(shard=shard).update(**changes):
+            cls.objects.get_or_create(shard=shard)
+            cls.objects.filter(shard=shard).update(**changes)
+    
+    @classmethod
+    def totals(cls):
+        """Sum all shards into the summary payload"""
+        totals = cls.objects.aggregate(
+            total_accounts=Sum('total_accounts'),
+            active_accounts=Sum('active_accounts'),
+            total_deposits=Sum('total_deposits'),
+            total_transactions=Sum('total_transactions'),
+        )
+        return {field: value or 0 for field, value in totals.items()}
+    
+    @classmethod
+    def current(cls):
+        """Totals served from the cache for BANK_SUMMARY_CACHE_TTL seconds"""
+        return cache.get_or_set(cls.CACHE_KEY, cls.totals, settings.BANK_SUMMARY_CACHE_TTL)
+    
+    @classmethod
+    def rebuild(cls):
+        """Recompute the totals from the accounts table.
+        
+        Postings that commit while the rebuild runs may be missed, so run it
+        while writes are quiesced.
+        """
+        with db_transaction.atomic():
+            accounts = Account.objects.aggregate(
+                total_accounts=models.Count('pk'),
+                active_accounts=models.Count('pk', filter=models.Q(is_active=True)),
+                total_deposits=Sum('balance'),
+                # Counts archived postings too, unlike the ledger table
+                total_transactions=Sum('transaction_count'),
+            )
+            cls.objects.all().delete()
+            summary = cls.objects.create(
+                shard=0,
+                total_accounts=accounts['total_accounts'],
+                active_accounts=accounts['active_accounts'],
+                total_deposits=accounts['total_deposits'] or Decimal('0.00'),
+                total_transactions=accounts['total_transactions'] or 0,
+            )
+        cache.delete(cls.CACHE_KEY)
+        return summary
+
+
+def record_postings(transactions):
+    """Derived bookkeeping for newly saved ledger rows.
+    
+    Called inside the posting's transaction, after the rows are inserted.
+    """
+    DailyRollup.record(transactions)
+    account_cache.invalidate({posted.account_id for posted in transactions})
+    events.publish_postings(transactions)
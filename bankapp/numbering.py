@@ -0,0 +1,75 @@
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import F
+
+FIRST_ACCOUNT_NUMBER = 1001
+
+
+class AccountNumberAllocator:
+    """Hands out account numbers from blocks reserved in the database.
+    
+    Each process reserves ``block_size`` numbers at a time with one UPDATE on
+    the sequence row, then serves them from memory, so creating an account
+    never scans the accounts table and concurrent workers can never pick the
+    same number. Numbers left in a block when a process exits are skipped.
+    
+    A block reserved inside a transaction that is later rolled back may be
+    handed out again, so reserve numbers before opening the transaction that
+    uses them.
+    """
+    
+    def __init__(self, name='account', block_size=None):
+        self.name = name
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._next = self._end = 0
+    
+    def allocate(self):
+        """Return the next free account number as a string"""
+        with self._lock:
+            # Forked workers must not serve numbers from the parent's block
+            if self._pid != os.getpid() or self._next >= self._end:
+                self._pid = os.getpid()
+                self._next, self._end = self.reserve(self.block_size or settings.BANK_ACCOUNT_NUMBER_BLOCK)
+            number = self._next
+            self._next += 1
+        return str(number)
+    
+    def allocate_many(self, count):
+        """Reserve ``count`` consecutive account numbers for a bulk load"""
+        start, end = self.reserve(count)
+        return [str(number) for number in range(start, end)]
+    
+    def reserve(self, size):
+        """Atomically claim ``size`` numbers and return the ``(start, end)`` range"""
+        from .models import AccountNumberSequence
+        
+        with db_transaction.atomic():
+            rows = AccountNumberSequence.objects.filter(name=self.name)
+            if not rows.update(next_value=F('next_value') + size):
+                AccountNumberSequence.objects.get_or_create(
+                    name=self.name, defaults={'next_value': highest_account_number() + 1}
+                )
+                rows.update(next_value=F('next_value') + size)
+            end = rows.values_list('next_value', flat=True).get()
+        return end - size, end
+
+
+def highest_account_number(accounts=None):
+    """Largest numeric account number in use (one full scan; only for seeding)"""
+    if accounts is None:
+        from .models import Account
+        accounts = Account.objects
+    
+    highest = FIRST_ACCOUNT_NUMBER - 1
+    for number in accounts.values_list('account_number', flat=True).iterator():
+        if number.isdigit():
+            highest = max(highest, int(number))
+    return highest
+
+
+account_numbers = AccountNumberAllocator()
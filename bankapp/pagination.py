@@ -0,0 +1,83 @@
+from datetime import timedelta
+from itertools import islice
+
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class TransactionCursorPagination(CursorPagination):
+    """Keyset pagination over the ledger, newest first.
+    
+    Pages are located by the timestamp of the last row seen (with ``id`` as a
+    tie-breaker) instead of an OFFSET, and no COUNT(*) is issued, so deep pages
+    cost the same as the first one.
+    """
+    ordering = ('-timestamp', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    
+    def get_next_link_after(self, instances, url):
+        """Cursor link to the rows that follow ``instances`` in listing order"""
+        self.base_url = url
+        self.page = list(instances)
+        if not self.page:
+            return None
+        self.page_size = len(self.page)
+        self.cursor = None
+        self.has_next = True
+        self.next_position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.get_next_link()
+
+
+class ArchivePagination:
+    """Pages of an account's archived transactions, newest first.
+    
+    Archived rows are all older than the hot ones, so an account's history
+    continues here once its TransactionCursorPagination pages run out. Pages
+    are keyed by the ``timestamp,id`` of the last row shown.
+    """
+    query_param = 'archived_before'
+    
+    def __init__(self, request, archive):
+        self.request = request
+        self.archive = archive
+        self.page_size = TransactionCursorPagination().get_page_size(request)
+    
+    def get_position(self):
+        """``(timestamp, id)`` the request asks to continue from, or None; raises ValueError"""
+        value = self.request.query_params.get(self.query_param)
+        if not value:
+            return None
+        timestamp, _, pk = value.rpartition(',')
+        moment = parse_datetime(timestamp)
+        if moment is None or not pk.isdigit():
+            raise ValueError(f"Invalid {self.query_param}: {value}")
+        return moment, int(pk)
+    
+    def get_link(self, position):
+        url = remove_query_param(self.request.build_absolute_uri(), TransactionCursorPagination.cursor_query_param)
+        return replace_query_param(url, self.query_param, f'{position[0].isoformat()},{position[1]}')
+    
+    def get_first_link(self):
+        """Link to the first archived page, following the last page of hot rows"""
+        return self.get_link((self.archive.cutoff, 0))
+    
+    def paginate(self, account_number, position, start=None, end=None):
+        """The archived rows strictly before ``position``; returns ``(rows, next_link)``"""
+        if position:
+            limit = position[0] + timedelta(microseconds=1)
+            end = min(end, limit) if end else limit
+        rows = self.archive.rows(account_number, start, end, newest_first=True)
+        if position:
+            rows = (row for row in rows if (row['timestamp'], row['id']) < position)
+        
+        page = list(islice(rows, self.page_size + 1))
+        if len(page) <= self.page_size:
+            return page, None
+        page = page[:self.page_size]
+        return page, self.get_link((page[-1]['timestamp'], page[-1]['id']))
+    
+    def get_paginated_response(self, data, next_link):
+        return Response({'next': next_link, 'previous': None, 'results': data})
@@ -0,0 +1,156 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# Monthly range partitioning of the ledger on PostgreSQL. Partition bounds are
+# UTC month starts; rows outside every monthly partition land in the default one.
+TABLE = 'bankapp_transaction'
+LEGACY = f'{TABLE}_legacy'
+DEFAULT = f'{TABLE}_default'
+SEQUENCE = f'{TABLE}_id_seq'
+INDEXES = {
+    'txn_account_timestamp_idx': '("account_id", "timestamp" DESC, "id" DESC)',
+    'txn_timestamp_idx': '("timestamp" DESC, "id" DESC)',
+}
+
+
+def month_start(moment):
+    """First instant (UTC) of the month containing ``moment``"""
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _literal(moment):
+    # Partition bounds are DDL, which takes no query parameters
+    return f"'{moment.isoformat()}'::timestamptz"
+
+
+def partition_name(month):
+    return f'{TABLE}_{month:%Y_%m}'
+
+
+def is_partitioned(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [TABLE])
+        return cursor.fetchone() is not None
+
+
+def ensure_partitions(connection, months_ahead, start=None):
+    """Create the monthly partitions from ``start``'s month (default: now) through ``months_ahead`` more.
+    
+    Rows already sitting in the default partition for a new month are moved
+    into it. Returns the names of the partitions created.
+    """
+    month = month_start(start or timezone.now())
+    last = add_months(month, months_ahead)
+    created = []
+    with connection.cursor() as cursor:
+        # Months before this are held by the legacy partition
+        month = max(month, _legacy_end(cursor) or month)
+        while month <= last:
+            name, following = partition_name(month), add_months(month, 1)
+            cursor.execute('SELECT to_regclass(%s)', [name])
+            if cursor.fetchone()[0] is None:
+                _create_partition(cursor, name, month, following)
+                created.append(name)
+            month = following
+    return created
+
+
+def _legacy_end(cursor):
+    """Upper bound of the legacy partition, parsed from its ``FOR VALUES FROM (MINVALUE) TO ('...')`` clause"""
+    cursor.execute('SELECT pg_get_expr(relpartbound, oid) FROM pg_class WHERE oid = to_regclass(%s)', [LEGACY])
+    row = cursor.fetchone()
+    if not row or not row[0]:
+        return None
+    return parse_datetime(row[0].rsplit("'", 2)[-2])
+
+
+def _create_partition(cursor, name, month, following):
+    bounds = [month, following]
+    cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {DEFAULT} WHERE "timestamp" >= %s AND "timestamp" < %s)', bounds)
+    if not cursor.fetchone()[0]:
+        cursor.execute(f'CREATE TABLE {name} PARTITION OF {TABLE} '
+                       f'FOR VALUES FROM ({_literal(month)}) TO ({_literal(following)})')
+        return
+    
+    # The default partition would overlap the new one: take it out, create the
+    # month, move the stray rows across and put the default back
+    cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT}')
+    cursor.execute(f'CREATE TABLE {name} PARTITION OF {TABLE} '
+                   f'FOR VALUES FROM ({_literal(month)}) TO ({_literal(following)})')
+    cursor.execute(f'INSERT INTO {name} SELECT * FROM {DEFAULT} WHERE "timestamp" >= %s AND "timestamp" < %s', bounds)
+    cursor.execute(f'DELETE FROM {DEFAULT} WHERE "timestamp" >= %s AND "timestamp" < %s', bounds)
+    cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT} DEFAULT')
+
+
+def partition_table(connection, months_ahead):
+    """Turn the plain ledger table into a table range-partitioned by month.
+    
+    The existing table is not copied: it is attached as the partition for
+    everything before next month, and new monthly partitions follow it. The
+    primary key becomes ``(id, timestamp)`` because PostgreSQL requires the
+    partition key in every unique constraint; ids still come from a single
+    sequence, so they stay unique. No-op if already partitioned.
+    """
+    if is_partitioned(connection):
+        return
+    
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT MAX("timestamp"), COALESCE(MAX("id"), 0) + 1 FROM {TABLE}')
+        newest, next_id = cursor.fetchone()
+        boundary = add_months(month_start(max(filter(None, [newest, timezone.now()]))), 1)
+        
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {LEGACY}')
+        for index in INDEXES:
+            cursor.execute(f'ALTER INDEX IF EXISTS {index} RENAME TO {LEGACY}_{index}')
+        
+        # Partitions cannot keep an identity column: hand ids over to a sequence owned by the parent
+        cursor.execute(f'ALTER TABLE {LEGACY} ALTER COLUMN "id" DROP IDENTITY IF EXISTS')
+        cursor.execute(f'ALTER TABLE {LEGACY} ALTER COLUMN "id" DROP DEFAULT')
+        cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {SEQUENCE} AS bigint')
+        cursor.execute('SELECT setval(%s, %s, false)', [SEQUENCE, next_id])
+        
+        cursor.execute(
+            f'CREATE TABLE {TABLE} (LIKE {LEGACY} INCLUDING DEFAULTS INCLUDING STORAGE) '
+            f'PARTITION BY RANGE ("timestamp")'
+        )
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN \"id\" SET DEFAULT nextval('{SEQUENCE}')")
+        cursor.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}."id"')
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey_partitioned PRIMARY KEY ("id", "timestamp")')
+        cursor.execute(
+            f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_account_id_fk_partitioned '
+            f'FOREIGN KEY ("account_id") REFERENCES bankapp_account ("account_number") '
+            f'DEFERRABLE INITIALLY DEFERRED'
+        )
+        
+        # A partition's primary key must match the parent's (id, timestamp): ATTACH
+        # would otherwise try to add that key next to the existing one on id
+        cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'",
+                       [LEGACY])
+        for (constraint,) in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {LEGACY} DROP CONSTRAINT "{constraint}"')
+        cursor.execute(f'ALTER TABLE {LEGACY} ADD CONSTRAINT {LEGACY}_pkey PRIMARY KEY ("id", "timestamp")')
+        
+        # A validated CHECK lets ATTACH skip its own full scan under an exclusive lock
+        cursor.execute(
+            f'ALTER TABLE {LEGACY} ADD CONSTRAINT {LEGACY}_bound CHECK ("timestamp" < {_literal(boundary)}) NOT VALID'
+        )
+        cursor.execute(f'ALTER TABLE {LEGACY} VALIDATE CONSTRAINT {LEGACY}_bound')
+        cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY} FOR VALUES FROM (MINVALUE) TO ({_literal(boundary)})')
+        cursor.execute(f'ALTER TABLE {LEGACY} DROP CONSTRAINT {LEGACY}_bound')
+        cursor.execute(f'CREATE TABLE {DEFAULT} PARTITION OF {TABLE} DEFAULT')
+        
+        # Matching indexes already on the legacy partition are attached rather than rebuilt
+        for index, columns in INDEXES.items():
+            cursor.execute(f'CREATE INDEX {index} ON {TABLE} {columns}')
+    
+    ensure_partitions(connection, months_ahead, start=boundary)
@@ -0,0 +1,95 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Cookie holding the time until which a client that wrote reads from the primary
+STICKY_COOKIE = 'bank_read_primary_until'
+
+# Alias that reads of the current request go to; None means the primary
+_read_alias = ContextVar('bank_read_alias', default=None)
+
+
+@contextmanager
+def use_primary():
+    """Send reads inside the block to the primary, e.g. to fill a cache that must be exact"""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Route bankapp reads to BANK_READ_REPLICA while ReplicaMiddleware allows it.
+    
+    Writes, ``select_for_update`` querysets (which Django sends through
+    ``db_for_write``) and reads inside an open transaction on the primary
+    always use the primary, as do the models of other apps (sessions, auth).
+    """
+    
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or model._meta.app_label != 'bankapp':
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+    
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+    
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+    
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica receives its schema through replication
+        if db == settings.BANK_READ_REPLICA:
+            return False
+        return None
+
+
+def _is_sticky(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaMiddleware:
+    """Serve safe requests from the read replica.
+    
+    A write response sets a cookie that sends the same client's reads to the
+    primary for the next BANK_REPLICA_STICKY_SECONDS, so it always sees its
+    own postings even while the replica lags behind. Keeping the flag with
+    the client means it works across worker processes and does not leak to
+    other clients behind the same address.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        replica = settings.BANK_READ_REPLICA
+        if not replica:
+            return self.get_response(request)
+        
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            seconds = settings.BANK_REPLICA_STICKY_SECONDS
+            response.set_cookie(STICKY_COOKIE, str(int(time.time()) + seconds), max_age=seconds,
+                                httponly=True, samesite='Lax')
+            return response
+        
+        if _is_sticky(request):
+            return self.get_response(request)
+        
+        token = _read_alias.set(replica)
+        try:
+            return self.get_response(request)
+        finally:
+            _read_alias.reset(token)
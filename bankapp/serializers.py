@@ -1,5 +1,9 @@
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.reverse import reverse
+from .importing import FORMATS
 from .models import Account, Transaction
+from .pagination import TransactionCursorPagination
 
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -16,13 +20,41 @@ class TransactionSerializer(serializers.ModelSerializer):
 class AccountSerializer(serializers.ModelSerializer):
     """Serializer for Account model"""
     transaction_count = serializers.IntegerField(source='get_transaction_count', read_only=True)
-    transactions = TransactionSerializer(many=True, read_only=True)
+    transactions = serializers.SerializerMethodField()
+    transactions_next = serializers.SerializerMethodField()
     
     class Meta:
         model = Account
         fields = ['account_number', 'account_holder', 'balance', 'is_active', 
-                 'created_at', 'updated_at', 'transaction_count', 'transactions']
+                 'created_at', 'updated_at', 'transaction_count', 'transactions', 'transactions_next']
         read_only_fields = ['account_number', 'created_at', 'updated_at']
+    
+    def to_representation(self, instance):
+        self._recent = list(instance.transactions.order_by('-timestamp', '-id')[:settings.BANK_EMBEDDED_TRANSACTIONS])
+        return super().to_representation(instance)
+    
+    def get_transactions(self, obj):
+        """Embed only the most recent transactions"""
+        return TransactionSerializer(self._recent, many=True).data
+    
+    def get_transactions_next(self, obj):
+        """Cursor link to the history that does not fit in the embedded slice"""
+        if obj.get_transaction_count() <= len(self._recent):
+            return None
+        url = reverse('account-transactions', kwargs={'pk': obj.pk}, request=self.context.get('request'))
+        if not self._recent:
+            # Every posting has been archived; the history endpoint pages through the archive
+            return url
+        return TransactionCursorPagination().get_next_link_after(self._recent, url)
+
+
+class AccountBalanceSerializer(serializers.ModelSerializer):
+    """Minimal account state returned by write actions"""
+    transaction_count = serializers.IntegerField(source='get_transaction_count', read_only=True)
+    
+    class Meta:
+        model = Account
+        fields = ['account_number', 'balance', 'is_active', 'updated_at', 'transaction_count']
 
 
 class AccountListSerializer(serializers.ModelSerializer):
@@ -45,35 +77,10 @@ class CreateAccountSerializer(serializers.ModelSerializer):
         fields = ['account_holder', 'initial_balance']
     
     def create(self, validated_data):
-        initial_balance = validated_data.pop('initial_balance', 0)
-        
-        # Generate account number
-        last_account = Account.objects.order_by('-account_number').first()
-        if last_account:
-            try:
-                next_num = int(last_account.account_number) + 1
-            except ValueError:
-                next_num = 1001
-        else:
-            next_num = 1001
-        
-        account = Account.objects.create(
-            account_number=str(next_num),
-            account_holder=validated_data['account_holder'],
-            balance=initial_balance
+        return Account.open(
+            validated_data['account_holder'],
+            validated_data.get('initial_balance', 0)
         )
-        
-        # Create initial transaction if balance > 0
-        if account.balance > 0:
-            Transaction.objects.create(
-                account=account,
-                transaction_type='INITIAL',
-                amount=account.balance,
-                balance_after=account.balance,
-                description='Account opened'
-            )
-        
-        return account
 
 
 class DepositSerializer(serializers.Serializer):
@@ -99,3 +106,36 @@ class TransferSerializer(serializers.Serializer):
             raise serializers.ValidationError("Source and destination accounts cannot be the same.")
         return data
 
+
+class PostingSerializer(serializers.Serializer):
+    """Serializer for a single posting inside a batch"""
+    account = serializers.CharField()
+    transaction_type = serializers.ChoiceField(choices=['DEPOSIT', 'WITHDRAWAL'])
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=0.01)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class BatchPostingSerializer(serializers.Serializer):
+    """Serializer for a batch of deposits/withdrawals"""
+    postings = PostingSerializer(many=True, allow_empty=False)
+    
+    def validate_postings(self, postings):
+        # The whole batch holds its accounts' row locks in one transaction
+        if len(postings) > settings.BANK_BATCH_MAX_POSTINGS:
+            raise serializers.ValidationError(
+                f"A batch can contain at most {settings.BANK_BATCH_MAX_POSTINGS} postings.")
+        return postings
+
+
+class AccountImportSerializer(serializers.Serializer):
+    """Serializer for a bulk account import upload"""
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=FORMATS, required=False)
+
+
+class DailyRollupSerializer(serializers.Serializer):
+    """Count and sum of one transaction type on one day"""
+    date = serializers.DateField()
+    transaction_type = serializers.CharField()
+    count = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=20, decimal_places=2)
@@ -0,0 +1,111 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import archive
+from .models import Transaction
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+COLUMNS = ['id', 'timestamp', 'transaction_type', 'transaction_type_display',
+           'amount', 'balance_after', 'description']
+TYPE_DISPLAY = dict(Transaction.TRANSACTION_TYPES)
+
+
+def parse_bound(value, end=False):
+    """Parse a ``from``/``to`` query value (date or datetime) into an aware datetime.
+    
+    A plain date as the upper bound includes that whole day.
+    """
+    if not value:
+        return None
+    
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value}")
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def within(queryset, start=None, end=None):
+    """Restrict ledger rows to ``start <= timestamp < end`` (either bound optional).
+    
+    On the month-partitioned PostgreSQL ledger the bounds also let the planner
+    skip every partition outside the window.
+    """
+    if start:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end:
+        queryset = queryset.filter(timestamp__lt=end)
+    return queryset
+
+
+def window(params):
+    """``(start, end)`` from the ``from``/``to`` query params; raises ValueError"""
+    return parse_bound(params.get('from')), parse_bound(params.get('to'), end=True)
+
+
+def statement_rows(account, start=None, end=None, using=None):
+    """Yield the account's transactions in chronological order as dicts.
+    
+    Archived rows (older than the archive cutoff) come first, read one
+    account block at a time; hot rows are fetched with a server-side cursor
+    in chunks, so memory use does not depend on the length of the statement.
+    ``using`` pins the database the rows are read from (default: routed when
+    the query runs).
+    """
+    cutoff = archive.current().cutoff
+    rows = iter(())
+    if cutoff and (start is None or start < cutoff):
+        rows = archive.current().rows(account.pk, start, min(filter(None, [end, cutoff])))
+        start = cutoff
+    
+    fields = [column for column in COLUMNS if column != 'transaction_type_display']
+    queryset = within(Transaction.objects.db_manager(using).filter(account=account), start, end)
+    hot = queryset.order_by('timestamp', 'id').values_list(*fields).iterator(
+        chunk_size=settings.BANK_STATEMENT_CHUNK_SIZE)
+    for row in chain(rows, (dict(zip(fields, values)) for values in hot)):
+        row['transaction_type_display'] = TYPE_DISPLAY.get(row['transaction_type'], row['transaction_type'])
+        yield row
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back to the caller"""
+    
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow([
+            row['id'], row['timestamp'].isoformat(), row['transaction_type'], row['transaction_type_display'],
+            row['amount'], row['balance_after'], row['description'],
+        ])
+
+
+def render_ndjson(rows):
+    for row in rows:
+        row['timestamp'] = row['timestamp'].isoformat()
+        row['amount'] = str(row['amount'])
+        row['balance_after'] = str(row['balance_after'])
+        yield json.dumps({column: row[column] for column in COLUMNS}) + '\n'
+
+
+RENDERERS = {
+    'csv': render_csv,
+    'ndjson': render_ndjson,
+}
@@ -1,24 +1,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Sum, Count
-from django.db import transaction as db_transaction
-from .models import Account, Transaction
+from . import account_cache
+from .models import Account, BankSummary
 from .forms import AccountForm, DepositForm, WithdrawForm, TransferForm
 
 
 def home(request):
     """Home page with bank summary"""
-    total_accounts = Account.objects.count()
-    active_accounts = Account.objects.filter(is_active=True).count()
-    total_deposits = Account.objects.aggregate(total=Sum('balance'))['total'] or 0
-    total_transactions = Transaction.objects.count()
-    
-    context = {
-        'total_accounts': total_accounts,
-        'active_accounts': active_accounts,
-        'total_deposits': total_deposits,
-        'total_transactions': total_transactions,
-    }
+    context = BankSummary.current()
     return render(request, 'bankapp/home.html', context)
 
 
@@ -31,9 +20,11 @@ def account_list(request):
 
 def account_detail(request, account_number):
     """View account details and transactions"""
-    account = get_object_or_404(Account, account_number=account_number)
-    transactions = account.transactions.all()[:50]  # Last 50 transactions
+    def load():
+        account = get_object_or_404(Account, account_number=account_number)
+        return account, list(account.transactions.all()[:50])  # Last 50 transactions
     
+    account, transactions = account_cache.get_or_render(account_number, 'detail', load)
     context = {
         'account': account,
         'transactions': transactions,
@@ -46,32 +37,11 @@ def create_account(request):
     if request.method == 'POST':
         form = AccountForm(request.POST)
         if form.is_valid():
-            # Generate account number
-            last_account = Account.objects.order_by('-account_number').first()
-            if last_account:
-                try:
-                    next_num = int(last_account.account_number) + 1
-                except ValueError:
-                    next_num = 1001
-            else:
-                next_num = 1001
-            
-            account = Account.objects.create(
-                account_number=str(next_num),
-                account_holder=form.cleaned_data['account_holder'],
-                balance=form.cleaned_data.get('initial_balance', 0)
+            account = Account.open(
+                form.cleaned_data['account_holder'],
+                form.cleaned_data.get('initial_balance')
             )
             
-            # Create initial transaction if balance > 0
-            if account.balance > 0:
-                Transaction.objects.create(
-                    account=account,
-                    transaction_type='INITIAL',
-                    amount=account.balance,
-                    balance_after=account.balance,
-                    description='Account opened'
-                )
-            
             messages.success(request, f'Account {account.account_number} created successfully!')
             return redirect('account_detail', account_number=account.account_number)
     else:
@@ -134,16 +104,10 @@ def transfer(request):
             amount = form.cleaned_data['amount']
             
             try:
-                with db_transaction.atomic():
-                    # Withdraw from source
-                    from_account.withdraw(amount, f'Transfer to account {to_account.account_number}')
-                    
-                    # Deposit to destination
-                    to_account.deposit(amount, f'Transfer from account {from_account.account_number}')
-                
+                Account.transfer(from_account.account_number, to_account.account_number, amount)
                 messages.success(request, f'Successfully transferred ${amount} from account {from_account.account_number} to {to_account.account_number}')
                 return redirect('account_detail', account_number=from_account.account_number)
-            except ValueError as e:
+            except (ValueError, Account.DoesNotExist) as e:
                 messages.error(request, str(e))
     else:
         form = TransferForm()
@@ -1,17 +1,23 @@
-"""
-ASGI config for bankproject project.
-
-It exposes the ASGI callable as a module-level variable named ``application``.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
-"""
-
-import os
-
-from django.core.asgi import get_asgi_application
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bankproject.settings')
-
-application = get_asgi_application()
-
+"""
+ASGI config for bankproject project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bankproject.settings')
+
+application = get_asgi_application()
+
+from bankapp.events import CancelOnDisconnect  # noqa: E402 (needs the app registry)
+
+# Django 4.2 does not notice disconnects during streaming responses; without
+# this every closed live feed would keep its subscription forever
+application = CancelOnDisconnect(application, paths=['/api/events/'])
+
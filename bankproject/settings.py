@@ -1,141 +1,238 @@
-"""
-Django settings for bankproject project.
-"""
-
-from pathlib import Path
-import os
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
-
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-bank-management-system-key-change-in-production'
-
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = ['*']
-
-
-# Application definition
-
-INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-    'rest_framework',
-    'corsheaders',
-    'bankapp',
-]
-
-MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'corsheaders.middleware.CorsMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
-]
-
-ROOT_URLCONF = 'bankproject.urls'
-
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
-        'APP_DIRS': True,
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-            ],
-        },
-    },
-]
-
-WSGI_APPLICATION = 'bankproject.wsgi.application'
-
-
-# Database
-# https://docs.djangoproject.com/en/4.2/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
-
-
-# Password validation
-# https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
-
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
-    },
-]
-
-
-# Internationalization
-# https://docs.djangoproject.com/en/4.2/topics/i18n/
-
-LANGUAGE_CODE = 'en-us'
-
-TIME_ZONE = 'UTC'
-
-USE_I18N = True
-
-USE_TZ = True
-
-
-# Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/4.2/howto/static-files/
-
-STATIC_URL = 'static/'
-STATICFILES_DIRS = [
-    BASE_DIR / 'static',
-]
-
-# Default primary key field type
-# https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
-
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-
-# REST Framework Configuration
-REST_FRAMEWORK = {
-    'DEFAULT_PERMISSION_CLASSES': [
-        'rest_framework.permissions.AllowAny',
-    ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 50
-}
-
-# CORS Configuration
-CORS_ALLOWED_ORIGINS = [
-    "http://localhost:3000",
-    "http://127.0.0.1:3000",
-]
-
-CORS_ALLOW_CREDENTIALS = True
-
+"""
+Django settings for bankproject project.
+"""
+
+from pathlib import Path
+import os
+
+from corsheaders.defaults import default_headers
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'django-insecure-bank-management-system-key-change-in-production'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = ['*']
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'rest_framework',
+    'corsheaders',
+    'bankapp',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'bankapp.routing.ReplicaMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'bankproject.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'bankproject.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+
+# bankapp.backends.sqlite3 is the stock SQLite backend with WAL journaling,
+# tuned pragmas and BEGIN IMMEDIATE transactions (see its DatabaseWrapper);
+# measure it with `python manage.py benchmark_postings`.
+DATABASES = {
+    'default': {
+        'ENGINE': 'bankapp.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': 20,
+            'pragmas': {'busy_timeout': 20000},
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+# Cold storage for old ledger rows (see `python manage.py archive_transactions`):
+# segment files and their manifest live in BANK_ARCHIVE_DIR, and by default
+# postings older than BANK_ARCHIVE_RETENTION_DAYS are moved there. The cutoff
+# must be at least BANK_ARCHIVE_SAFETY_MARGIN seconds in the past, so postings
+# still being committed are never left behind it.
+BANK_ARCHIVE_DIR = BASE_DIR / 'archive'
+BANK_ARCHIVE_RETENTION_DAYS = 365
+BANK_ARCHIVE_SAFETY_MARGIN = 60 * 60
+
+# Optional PostgreSQL (needs psycopg): set BANK_POSTGRES_DB, plus
+# BANK_POSTGRES_USER/_PASSWORD/_HOST/_PORT as needed. There the ledger table is
+# range-partitioned by month (migration 0009); keep partitions created
+# BANK_TRANSACTION_PARTITIONS_AHEAD months ahead by running
+# `python manage.py create_transaction_partitions` monthly.
+if os.environ.get('BANK_POSTGRES_DB'):
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ['BANK_POSTGRES_DB'],
+        'USER': os.environ.get('BANK_POSTGRES_USER', ''),
+        'PASSWORD': os.environ.get('BANK_POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('BANK_POSTGRES_HOST', ''),
+        'PORT': os.environ.get('BANK_POSTGRES_PORT', ''),
+    }
+BANK_TRANSACTION_PARTITIONS_AHEAD = 3
+
+# Optional read replica. Safe (GET/HEAD/OPTIONS) requests read bankapp data
+# from it, except for clients that sent a write in the last
+# BANK_REPLICA_STICKY_SECONDS (tracked by a cookie, so the frontend must be
+# served from the same site as the API, e.g. both on localhost). Set
+# BANK_REPLICA_DB to a copy of db.sqlite3 to try it locally, or replace the
+# entry with a real replica's connection.
+if os.environ.get('BANK_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'bankapp.backends.sqlite3',
+        'NAME': os.environ['BANK_REPLICA_DB'],
+    }
+BANK_READ_REPLICA = 'replica' if 'replica' in DATABASES else None
+BANK_REPLICA_STICKY_SECONDS = 5
+
+DATABASE_ROUTERS = ['bankapp.routing.ReplicaRouter']
+
+
+# Password validation
+# https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/4.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/4.2/howto/static-files/
+
+STATIC_URL = 'static/'
+STATICFILES_DIRS = [
+    BASE_DIR / 'static',
+]
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# REST Framework Configuration
+REST_FRAMEWORK = {
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.AllowAny',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'PAGE_SIZE': 50
+}
+
+# Number of most recent transactions embedded in account detail responses;
+# older history is fetched through the account's transactions endpoint
+BANK_EMBEDDED_TRANSACTIONS = 20
+
+# Number of counter rows the bank summary is spread over, and how long (in
+# seconds) the summary and dashboard payloads are cached
+BANK_SUMMARY_SHARDS = 8
+BANK_SUMMARY_CACHE_TTL = 2
+BANK_DASHBOARD_CACHE_TTL = 10
+
+# How many account numbers each worker reserves from the database at a time
+BANK_ACCOUNT_NUMBER_BLOCK = 50
+
+# Accounts written per transaction by bulk imports
+BANK_IMPORT_CHUNK_SIZE = 5000
+
+# Largest batch accepted by the batch postings endpoint; a batch locks all of
+# its accounts until it commits
+BANK_BATCH_MAX_POSTINGS = 1000
+
+# Rows fetched per round trip when streaming account statements
+BANK_STATEMENT_CHUNK_SIZE = 2000
+
+# Idempotency-Key handling for postings: how long (in seconds) a key is
+# honoured, and how many recent responses each process keeps in memory.
+# Expired keys are deleted by `python manage.py purge_idempotency_keys`.
+BANK_IDEMPOTENCY_TTL = 24 * 60 * 60
+BANK_IDEMPOTENCY_CACHE_SIZE = 10000
+
+# How long (in seconds) rendered account reads stay cached. Entries are keyed by
+# a per-account version that every write bumps, so this only bounds memory use.
+# Invalidation is only seen by processes sharing the cache: configure a shared
+# backend (Redis, Memcached) in CACHES when running more than one worker.
+BANK_ACCOUNT_CACHE_TTL = 300
+
+# Live posting feed (/api/events/). The local broker only reaches clients
+# connected to the same process, so serve the feed from a single ASGI worker
+# (e.g. `uvicorn bankproject.asgi:application`). Heartbeat and max age are in
+# seconds; a stream is closed after its max age and the browser reconnects.
+BANK_EVENT_BROKER = 'bankapp.events.LocalBroker'
+BANK_EVENT_HEARTBEAT = 15
+BANK_EVENT_MAX_AGE = 10 * 60
+
+# CORS Configuration
+CORS_ALLOWED_ORIGINS = [
+    "http://localhost:3000",
+    "http://127.0.0.1:3000",
+]
+
+CORS_ALLOW_CREDENTIALS = True
+
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
@@ -3,7 +3,7 @@
 import { useEffect, useState } from 'react';
 import { useParams, useRouter } from 'next/navigation';
 import Navbar from '@/components/Navbar';
-import { accountApi, Account, Transaction } from '@/lib/api';
+import { accountApi, subscribeToPostings, Account, Transaction } from '@/lib/api';
 import toast from 'react-hot-toast';
 import { ArrowLeft, ArrowUp, ArrowDown, X, Clock, Wallet, TrendingUp, TrendingDown, ArrowLeftRight, CreditCard, Building2 } from 'lucide-react';
 import Link from 'next/link';
@@ -21,6 +21,15 @@ export default function AccountDetailPage() {
     fetchTransactions();
   }, [accountNumber]);
 
+  useEffect(() => {
+    return subscribeToPostings([accountNumber], (event) => {
+      setAccount((current) => current && { ...current, balance: event.balance });
+      setTransactions((current) =>
+        current.some((t) => t.id === event.transaction.id) ? current : [event.transaction, ...current]
+      );
+    });
+  }, [accountNumber]);
+
   const fetchAccount = async () => {
     try {
       const data = await accountApi.getById(accountNumber);
@@ -2,20 +2,18 @@
 
 import { useEffect, useState } from 'react';
 import Navbar from '@/components/Navbar';
-import { summaryApi, accountApi, transactionApi, Account, Transaction, BankSummary } from '@/lib/api';
+import { dashboardApi, Dashboard } from '@/lib/api';
 import { 
   TrendingUp, TrendingDown, DollarSign, Users, Activity, 
   ArrowUpRight, ArrowDownRight, Building2, CreditCard, PieChart
 } from 'lucide-react';
 import { LineChart, Line, AreaChart, Area, BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, Cell } from 'recharts';
-import { format, subDays, parseISO } from 'date-fns';
+import { format, parseISO } from 'date-fns';
 
 const COLORS = ['#10B981', '#3B82F6', '#8B5CF6', '#F59E0B', '#EF4444'];
 
 export default function DashboardPage() {
-  const [summary, setSummary] = useState<BankSummary | null>(null);
-  const [accounts, setAccounts] = useState<Account[]>([]);
-  const [recentTransactions, setRecentTransactions] = useState<Transaction[]>([]);
+  const [dashboard, setDashboard] = useState<Dashboard | null>(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -24,15 +22,8 @@ export default function DashboardPage() {
 
   const fetchDashboardData = async () => {
     try {
-      const [summaryData, accountsData, transactionsData] = await Promise.all([
-        summaryApi.getSummary(),
-        accountApi.getAll(),
-        transactionApi.getAll()
-      ]);
-      
-      setSummary(summaryData);
-      setAccounts(accountsData);
-      setRecentTransactions(transactionsData.slice(0, 10));
+      // All series are aggregated server-side and returned in one payload
+      setDashboard(await dashboardApi.getDashboard(7));
     } catch (error) {
       console.error('Failed to fetch dashboard data:', error);
     } finally {
@@ -40,54 +31,36 @@ export default function DashboardPage() {
     }
   };
 
+  const summary = dashboard?.summary ?? null;
+  const recentTransactions = dashboard?.recent_transactions ?? [];
+
   // Prepare chart data
   const prepareTransactionChartData = () => {
-    const last7Days = Array.from({ length: 7 }, (_, i) => {
-      const date = subDays(new Date(), 6 - i);
-      return {
-        date: format(date, 'MMM dd'),
-        deposits: 0,
-        withdrawals: 0,
-      };
-    });
-
-    recentTransactions.forEach(transaction => {
-      const date = parseISO(transaction.timestamp);
-      const dayIndex = last7Days.findIndex(d => 
-        format(parseISO(transaction.timestamp), 'MMM dd') === d.date
-      );
-      if (dayIndex !== -1) {
-        if (transaction.transaction_type === 'DEPOSIT' || transaction.transaction_type === 'INITIAL' || transaction.transaction_type === 'TRANSFER_IN') {
-          last7Days[dayIndex].deposits += parseFloat(transaction.amount);
-        } else {
-          last7Days[dayIndex].withdrawals += parseFloat(transaction.amount);
-        }
-      }
-    });
-
-    return last7Days;
+    return (dashboard?.activity ?? []).map(day => ({
+      date: format(parseISO(day.date), 'MMM dd'),
+      deposits: day.deposits,
+      withdrawals: day.withdrawals,
+    }));
   };
 
   const prepareAccountDistributionData = () => {
-    const activeAccounts = accounts.filter(acc => acc.is_active);
-    const totalBalance = activeAccounts.reduce((sum, acc) => sum + parseFloat(acc.balance), 0);
-    
-    return activeAccounts.slice(0, 5).map(acc => ({
+    return (dashboard?.top_accounts ?? []).map(acc => ({
       name: acc.account_holder,
-      value: parseFloat(acc.balance),
-      percentage: ((parseFloat(acc.balance) / totalBalance) * 100).toFixed(1)
+      value: acc.balance,
     }));
   };
 
   const prepareMonthlyData = () => {
-    const months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun'];
-    return months.map(month => ({
-      month,
-      balance: Math.random() * 1000000 + 500000,
-      transactions: Math.floor(Math.random() * 100) + 50
+    return (dashboard?.monthly ?? []).map(month => ({
+      month: format(parseISO(`${month.month}-01`), 'MMM'),
+      deposits: month.deposits,
+      transactions: month.transactions
     }));
   };
 
+  const totalInflow = (dashboard?.activity ?? []).reduce((sum, day) => sum + day.deposits, 0);
+  const totalOutflow = (dashboard?.activity ?? []).reduce((sum, day) => sum + day.withdrawals, 0);
+
   if (loading) {
     return (
       <div className="min-h-screen relative z-10">
@@ -128,39 +101,19 @@ export default function DashboardPage() {
             <div className="bg-white/5 rounded-lg p-4 border border-white/10">
               <p className="text-white/60 text-sm mb-1">Total Deposits</p>
               <p className="text-2xl font-bold text-green-400">
-                ${recentTransactions
-                  .filter(t => t.transaction_type === 'DEPOSIT' || t.transaction_type === 'INITIAL' || t.transaction_type === 'TRANSFER_IN')
-                  .reduce((sum, t) => sum + parseFloat(t.amount), 0)
-                  .toLocaleString('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}
+                ${totalInflow.toLocaleString('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}
               </p>
             </div>
             <div className="bg-white/5 rounded-lg p-4 border border-white/10">
               <p className="text-white/60 text-sm mb-1">Total Withdrawals</p>
               <p className="text-2xl font-bold text-red-400">
-                ${recentTransactions
-                  .filter(t => t.transaction_type === 'WITHDRAWAL' || t.transaction_type === 'TRANSFER_OUT')
-                  .reduce((sum, t) => sum + parseFloat(t.amount), 0)
-                  .toLocaleString('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}
+                ${totalOutflow.toLocaleString('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}
               </p>
             </div>
             <div className="bg-white/5 rounded-lg p-4 border border-white/10">
               <p className="text-white/60 text-sm mb-1">Net Flow</p>
-              <p className={`text-2xl font-bold ${
-                recentTransactions
-                  .filter(t => t.transaction_type === 'DEPOSIT' || t.transaction_type === 'INITIAL' || t.transaction_type === 'TRANSFER_IN')
-                  .reduce((sum, t) => sum + parseFloat(t.amount), 0) >
-                recentTransactions
-                  .filter(t => t.transaction_type === 'WITHDRAWAL' || t.transaction_type === 'TRANSFER_OUT')
-                  .reduce((sum, t) => sum + parseFloat(t.amount), 0)
-                  ? 'text-green-400' : 'text-red-400'
-              }`}>
-                ${(recentTransactions
-                  .filter(t => t.transaction_type === 'DEPOSIT' || t.transaction_type === 'INITIAL' || t.transaction_type === 'TRANSFER_IN')
-                  .reduce((sum, t) => sum + parseFloat(t.amount), 0) -
-                recentTransactions
-                  .filter(t => t.transaction_type === 'WITHDRAWAL' || t.transaction_type === 'TRANSFER_OUT')
-                  .reduce((sum, t) => sum + parseFloat(t.amount), 0))
-                  .toLocaleString('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}
+              <p className={`text-2xl font-bold ${totalInflow > totalOutflow ? 'text-green-400' : 'text-red-400'}`}>
+                ${(totalInflow - totalOutflow).toLocaleString('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}
               </p>
             </div>
           </div>
@@ -316,7 +269,7 @@ export default function DashboardPage() {
                 }}
               />
               <Legend />
-              <Bar dataKey="balance" fill="#0066CC" name="Balance" radius={[8, 8, 0, 0]} />
+              <Bar dataKey="deposits" fill="#0066CC" name="Inflow" radius={[8, 8, 0, 0]} />
               <Bar dataKey="transactions" fill="#00A3E0" name="Transactions" radius={[8, 8, 0, 0]} />
             </BarChart>
           </ResponsiveContainer>
@@ -361,7 +314,7 @@ export default function DashboardPage() {
                       {format(parseISO(transaction.timestamp), 'MMM dd, yyyy HH:mm')}
                     </td>
                     <td className="px-6 py-4 whitespace-nowrap text-sm text-white/80">
-                      {transaction.transaction_type}
+                      {transaction.account_number}
                     </td>
                     <td className="px-6 py-4 whitespace-nowrap">
                       <span className={`px-2 py-1 text-xs font-semibold rounded-full ${
@@ -4,6 +4,8 @@ const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000/a
 
 const api = axios.create({
   baseURL: API_BASE_URL,
+  // Carries the API's read-your-writes cookie (see bankapp/routing.py)
+  withCredentials: true,
   headers: {
     'Content-Type': 'application/json',
   },
@@ -18,6 +20,7 @@ export interface Account {
   updated_at?: string;
   transaction_count?: number;
   transactions?: Transaction[];
+  transactions_next?: string | null;
 }
 
 export interface Transaction {
@@ -37,6 +40,31 @@ export interface BankSummary {
   total_transactions: number;
 }
 
+export interface FlowPoint {
+  deposits: number;
+  withdrawals: number;
+  transactions: number;
+}
+
+export interface Dashboard {
+  generated_at: string;
+  days: number;
+  summary: BankSummary;
+  activity: (FlowPoint & { date: string })[];
+  monthly: (FlowPoint & { month: string })[];
+  type_breakdown: { transaction_type: string; label: string; count: number; total: number }[];
+  balance_distribution: { bucket: string; accounts: number }[];
+  top_accounts: { account_number: string; account_holder: string; balance: number }[];
+  recent_transactions: (Transaction & { account_number: string })[];
+}
+
+export interface PostingEvent {
+  type: 'posting';
+  account_number: string;
+  balance: string;
+  transaction: Transaction;
+}
+
 export interface CreateAccountData {
   account_holder: string;
   initial_balance?: number;
@@ -87,7 +115,7 @@ export const accountApi = {
 
   getTransactions: async (accountNumber: string): Promise<Transaction[]> => {
     const response = await api.get(`/accounts/${accountNumber}/transactions/`);
-    return response.data;
+    return response.data.results || response.data;
   },
 };
 
@@ -116,5 +144,33 @@ export const summaryApi = {
   },
 };
 
+// Dashboard API
+export const dashboardApi = {
+  getDashboard: async (days: number = 7): Promise<Dashboard> => {
+    const response = await api.get('/dashboard/', { params: { days } });
+    return response.data;
+  },
+};
+
+// Live postings (Server-Sent Events); returns a function that closes the stream.
+// Opt-in with NEXT_PUBLIC_ENABLE_EVENTS=true, as the feed needs the API served over ASGI.
+const EVENTS_ENABLED = process.env.NEXT_PUBLIC_ENABLE_EVENTS === 'true';
+
+export const subscribeToPostings = (
+  accountNumbers: string[],
+  onPosting: (event: PostingEvent) => void
+): (() => void) => {
+  if (!EVENTS_ENABLED) {
+    return () => {};
+  }
+  const params = new URLSearchParams();
+  accountNumbers.forEach((number) => params.append('account', number));
+  const source = new EventSource(`${API_BASE_URL}/events/?${params.toString()}`);
+  source.addEventListener('posting', (message) => {
+    onPosting(JSON.parse((message as MessageEvent).data));
+  });
+  return () => source.close();
+};
+
 export default api;
 